@@ -1,191 +1,307 @@
-import requests
-import csv
-import datetime as dt
-import openpyxl as xl
+import hashlib
+import json
+import os
 import sys
 
-user_agent = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-                            'Chrome/103.0.0.0 Safari/537.36'}
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import arguments
+from dot_officials import client
+from dot_officials import export
+from dot_officials import metrics
+from dot_officials import records
+from dot_officials import socrata
+from dot_officials import store
+
 nyc_community_board = 'https://data.cityofnewyork.us/resource/ruf7-3wgc.json'
+# Columns requested from the dataset. Only the columns we export are requested.
+columns = ['borough', 'community_board', 'cb_website', 'cb_office_email', 'cb_chair', 'cb_district_manager',
+           'cb_office_address', 'cb_office_phone', 'cb_office_fax', 'cb_precinct_s', 'cb_precinct_phone_s']
+file_name = 'NYC Community Board'  # Name of the exported files, followed by the date and time.
+delta_name = 'NYC Community Board Delta'  # Name of the local copy of the dataset kept by --delta.
+# Name of the local copy of the dataset kept by the refresh service, apart from the one of --delta, so neither one
+# takes the changes the other hasn't exported yet.
+refresh_delta_name = 'NYC Community Board Refresh Delta'
+sheet_title = 'Community Boards'  # Name of the worksheet in the exported .xlsx file.
+
+# Headers for the Excel file to describe the columns of the data.
+headers = ['Borough', 'Community Board Number', 'Community Board Website', 'Community Board Email',
+           'Community Board Chair', 'Community Board District Manager',
+           'Community Board Address and Phone Number(s)', 'Precinct No.(s)', 'Precinct(s) Phone Number(s)']
+# Columns that identify a record when comparing against the previous export.
+key_columns = ['Borough', 'Community Board Number']
+
+
+# A Community Board, with its borough and number parsed. The address, phone and fax number of its office are kept
+# apart (None when missing), and joined into the block of text of the 'Address and Phone Number(s)' column on export.
+class CommunityBoard(records.Record):
+    __slots__ = ('borough', 'borough_label', 'number', 'number_label', 'website', 'email', 'chair', 'district_manager',
+                 'address', 'phone', 'fax', 'precincts', 'precinct_phones')
+
+    def __init__(self, borough_label, number_label, website, email, chair, district_manager, address, phone, fax,
+                 precincts, precinct_phones):
+        self.borough = records.Borough.parse(borough_label)
+        self.borough_label = borough_label
+        self.number = store.number(number_label)
+        self.number_label = number_label
+        self.website = website
+        self.email = email
+        self.chair = chair
+        self.district_manager = district_manager
+        self.address = address
+        self.phone = phone
+        self.fax = fax
+        self.precincts = precincts
+        self.precinct_phones = precinct_phones
+
+    # Helper method to build the text of the office's address, phone and fax number, one per line.
+    def office(self):
+        lines = [self.address if self.address is not None else 'No addresses found!',
+                 'Phone: ' + self.phone if self.phone is not None else 'No phone number found!',
+                 'Fax: ' + self.fax if self.fax is not None else 'No fax number found!']
+        return '\n'.join(lines).strip()
+
+    def row(self):
+        return [self.borough_label, self.number_label, self.website, self.email, self.chair, self.district_manager,
+                self.office(), self.precincts, self.precinct_phones]
+
+    def contacts(self):
+        contacts = store.email_contacts(self.email)
+        for kind, value in [('address', self.address), ('phone', self.phone), ('fax', self.fax)]:
+            if value and value.strip():
+                contacts.append((1, kind, value.strip()))
+        return contacts
+
+
+# Request, extract, and export the information regarding NYC's Community Boards.
+def main():
+    parser = arguments.build_parser("Scrape the contact information of NYC's Community Boards.")
+    parser.add_argument('--borough', help='Only scrape the Community Boards of this borough, such as Bronx.')
+    parser.add_argument('--app-token', help='Socrata app token, for higher rate limits. Defaults to the '
+                                            'SOCRATA_APP_TOKEN environment variable.')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--stream', action='store_true',
+                      help='Stream the records one at a time instead of loading them all, for large datasets. '
+                           'The rows are exported in the order the server sends them.')
+    mode.add_argument('--delta', action='store_true',
+                      help='Only request the records updated since the last --delta run, and merge them into the '
+                           'local copy of the dataset. Nothing is exported if no record changed.')
+    options = parser.parse_args()
+    if options.stream:
+        # The records are fetched, extracted and exported at the same time, so the stages are timed as one.
+        method = lambda: export_data(parse_stream(fetch_stream(borough=options.borough, token=options.app_token)),
+                                     diff=options.diff, database=options.store, prune=not options.borough,
+                                     formats=options.formats)
+    elif options.delta:
+        method = lambda: export_delta(borough=options.borough, token=options.app_token, diff=options.diff,
+                                      database=options.store, formats=options.formats)
+    else:
+        method = lambda: export_data(scrape(borough=options.borough, token=options.app_token), diff=options.diff,
+                                     database=options.store, prune=not options.borough, formats=options.formats)
+    metrics.run(file_name, method, profile=options.profile)
+
+
+# Request and extract the information regarding NYC's Community Boards. Returns the sorted rows of extracted data.
+# If the records were already requested with fetch_listing(), they can be given so they aren't requested again.
+def scrape(borough=None, token=None, listing=None):
+    with metrics.stage('fetch'):
+        community_boards = fetch(borough=borough, token=token) if listing is None else listing
+    with metrics.stage('extract'):
+        return parse(community_boards)
+
+
+# Request the records of NYC's Community Boards, or only those of a borough if one is given.
+# The server only sends the columns we export, and sorts the records by borough and board number.
+# Returns the list of records.
+def fetch(borough=None, token=None):
+    where = 'borough = ' + socrata.quote(borough) if borough else None
+
+    # Test if we can access the site. If the site still can't be reached after retrying, exit the program.
+    try:
+        return socrata.query(nyc_community_board, select=columns, where=where, order=['borough', 'community_board'],
+                             token=token)
+    except client.FetchError:
+        sys.exit('Invalid URL. Verify the NYC Community Board link!')
 
 
-def main():
-    # Test if we can access the site. If there are any errors being thrown, exit the program.
+# Helper method to get the path of a local copy of the dataset kept by fetch_delta(). Each borough has its own.
+def delta_path(borough=None, name=delta_name):
+    return name + (' ' + borough if borough else '') + '.json'
+
+
+# Request only the records of NYC's Community Boards that were added or updated since the local copy at path was last
+# saved, and the :id of every record to find the deleted ones, then merge them into the local copy (see socrata.sync()).
+# Takes the same options as fetch(). The merged copy isn't saved: save it with socrata.save_table() once it's exported.
+# Returns the merged records, the number of records that changed, and the merged copy.
+def fetch_delta(path, borough=None, token=None):
+    where = 'borough = ' + socrata.quote(borough) if borough else None
+
+    # Test if we can access the site. If the site still can't be reached after retrying, exit the program.
+    try:
+        community_boards, updated, deleted, table = socrata.sync(nyc_community_board, path, select=columns,
+                                                                 where=where, token=token)
+    except client.FetchError:
+        sys.exit('Invalid URL. Verify the NYC Community Board link!')
+    print(f'{updated} Community Board(s) added or updated and {deleted} removed since the last run.')
+    return community_boards, updated + deleted, table
+
+
+# The records are the only thing requested, so they're also the listing checked by the refresh service. The refresh
+# service polls the dataset, so it only requests the records that changed since its last refresh, into its own local
+# copy. The copy is saved right away: the refresh service only skips the export when the fingerprint of the merged
+# records matches the one of its last export, so a change is exported again if this export fails.
+def fetch_listing():
+    path = delta_path(name=refresh_delta_name)
+    community_boards, changed, table = fetch_delta(path)
+    socrata.save_table(path, table)
+    return community_boards
+
+
+# Fingerprint of the records, used by the refresh service to skip the export when nothing changed since the last
+# refresh.
+def fingerprint(listing):
+    return hashlib.sha256(json.dumps(listing, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+# Stream the records of NYC's Community Boards one at a time, or only those of a borough if one is given.
+# Takes the same options as fetch(), but the records are never all held in memory.
+def fetch_stream(borough=None, token=None):
+    where = 'borough = ' + socrata.quote(borough) if borough else None
+    records = socrata.stream(nyc_community_board, select=columns, where=where, order=['borough', 'community_board'],
+                             token=token)
+
+    # Test if we can access the site. If the site still can't be reached after retrying, exit the program.
     try:
-        request = requests.get(nyc_community_board, headers=user_agent)
-    except:
+        yield from records
+    except client.FetchError:
         sys.exit('Invalid URL. Verify the NYC Community Board link!')
 
-    # Retrieve the json file that contains the information regarding NYC's Community Boards.
-    json = request.json()
-
-    # Initialize am array that will hold arrays of extracted data for each community board.
-    extracted_data = []
-
-    # For each community board found in the JSON file:
-    for community_board in json:
-
-        # The JSON file contains the following keys that represent different contact info:
-        cb_borough = ''  # Borough of Community Board.
-        cb_num = ''  # Community Board #.
-        cb_website = ''  # URL to Community Board's Website.
-        cb_email = ''  # Email address of Community Board.
-        cb_chair = ''  # Name of Community Board's Chair.
-        cb_district_manager = ''  # Name of Community Board's District Manager.
-        cb_office_full_address = ''  # Address of Community Board's Office.
-        cb_precincts = ''  # Precinct(s) No. for Community Board.
-        cb_precinct_phone_num = ''  # Precinct(s) Phone Number.
-
-        # Initialize an empty array to store the extracted information.
-        # Data will be stored in the following format:
-        # [Borough, Community Board Number, Community Board Website, Community Board Email, Community Board Chair,
-        # Community Board District Manager, Community Board Address and Phone Number(s), Precinct No.(s,
-        # Precinct(s) Phone Number(s)]
-        board_data = []
-
-        # If the community board has a key of 'borough', extract the name of the borough.
-        if 'borough' in community_board:
-            cb_borough = community_board['borough']
-        else:
-            cb_borough = 'No Borough Found!'  # If they key doesn't exist, default to no value found.
-        board_data.append(cb_borough.strip())  # Add the data to the extracted data for the board.
-
-        # If the community board has a key of 'community_board', extract the number of the community board.
-        if 'community_board' in community_board:
-            cb_num = community_board['community_board']
-        else:
-            cb_num = 'No Community Board Number found!'  # If they key doesn't exist, default to no value found.
-        board_data.append(cb_num.strip())  # Add the data to the extracted data for the board.
-
-        # If the community board has a key of 'cb_website', extract the website of the community board.
-        if 'cb_website' in community_board and community_board['cb_website']['url']:
-            cb_website = community_board['cb_website']['url']  # Get the URL to the community board.
-        else:
-            cb_website = "No website URL found!"  # If they key doesn't exist, default to no value found.
-        board_data.append(cb_website.strip())  # Add the data to the extracted data for the board.
-
-        # If the community board has a key of 'cb_office_email', extract the email address of the community board.
-        if 'cb_office_email' in community_board:
-            cb_email = community_board['cb_office_email']
-        else:
-            cb_email = "No Email found!"  # If they key doesn't exist, default to no value found.
-        board_data.append(cb_email.strip())  # Add the data to the extracted data for the board.
-
-        # If the community board has a key of 'cb_chair', extract the chairperson's name.
-        if 'cb_chair' in community_board:
-            cb_chair = community_board['cb_chair']
-        else:
-            cb_chair = "No info found!"  # If they key doesn't exist, default to no value found.
-        board_data.append(cb_chair.strip())  # Add the data to the extracted data for the board.
-
-        # If the community board has a key of 'cb_district_manager', extract the district manager's name.
-        if 'cb_district_manager' in community_board:
-            cb_district_manager = community_board['cb_district_manager']  # Grab the district manager's name.
-        else:
-            cb_district_manager = "No info found!"  # If they key doesn't exist, default to no value found.
-        board_data.append(cb_district_manager.strip())  # Add the data to the extracted data for the board.
-
-        # String Builder for the Community Board's Address:
-        # If the community board has a key of 'cb_office_address', extract the street address.
-        if 'cb_office_address' in community_board:
-            cb_office_full_address = cb_office_full_address + community_board['cb_office_address'] + "\n"
-        else:
-            # If they key doesn't exist, default to no value found.
-            cb_office_full_address = cb_office_full_address + "No addresses found!" + "\n"
-
-        # If the community board has a key of 'cb_office_phone', extract the office phone number.
-        if 'cb_office_phone' in community_board:
-            cb_office_full_address = cb_office_full_address + "Phone: " + community_board['cb_office_phone'] + "\n"
-        else:
-            # If they key doesn't exist, default to no value found.
-            cb_office_full_address = cb_office_full_address + "No phone number found!" + "\n"
-
-        # If the community board has a key of 'cb_office_fax', extract the office fax number.
-        if 'cb_office_fax' in community_board:
-            cb_office_full_address = cb_office_full_address + "Fax: " + community_board['cb_office_fax'] + "\n"
-        else:
-            # If they key doesn't exist, default to no value found.
-            cb_office_full_address = cb_office_full_address + "No fax number found!" + "\n"
-
-        # Add the data to the extracted data for the board.
-        board_data.append(cb_office_full_address.strip())
-
-        # If the community board has a key of 'cb_precinct_s', extract the precinct number(s).
-        if 'cb_precinct_s' in community_board:
-            cb_precincts = community_board['cb_precinct_s']
-        else:
-            # If they key doesn't exist, default to no value found.
-            cb_precincts = "No precincts found!"
-        board_data.append(cb_precincts.strip())  # Add the data to the extracted data for the board.
-
-        # If the community board has a key of 'cb_precinct_phone_s', extract the phone number(s) for the precinct(s).
-        if 'cb_precinct_phone_s' in community_board:
-            cb_precinct_phone_num = community_board['cb_precinct_phone_s']
-        else:
-            # If they key doesn't exist, default to no value found.
-            cb_precinct_phone_num = "No precinct phone number found!"
-        board_data.append(cb_precinct_phone_num.strip())  # Add the data to the extracted data for the board.
-
-        # Extraction of data complete! Add the extracted data of the board to the list of extracted data.
-        extracted_data.append(board_data)
-
-    # Sort the community boards by the borough name and their number.
-    extracted_data.sort(key=lambda x: (x[0], get_cb_num(x[1])))
-
-    # Export the data.
-    export_data(extracted_data)
-
-
-# Helper sort method to convert string into a number to sort extracted data numerically.
-def get_cb_num(txt):
-    num = 0  # The numerical value found in the string.
-    # For each character in the string
-    for char in txt:
-        # If the ASCII value of the character is between 48 and 57, it's a digit.
-        if 48 <= ord(char) <= 57:
-            num = num * 10 + int(char)  # Parse the character as a number and multiply the number by 10 and add it.
-    return num  # Return the numerical value.
+
+# Extract the information regarding NYC's Community Boards out of the records returned by fetch().
+# Returns the sorted rows of extracted data.
+def parse(community_boards):
+    # Extract the data of each community board found in the JSON file.
+    extracted_data = [extract(community_board) for community_board in community_boards]
+
+    # Sort the community boards by the borough name and their number. The server already sorts them, but the board
+    # number is stored as text (so "10" comes before "2"), and the boards are sorted numerically here.
+    extracted_data.sort(key=lambda board: (board.borough_label, board.number or 0))
+
+    return extracted_data
+
+
+# Extract the information regarding NYC's Community Boards one record at a time, out of the records yielded by
+# fetch_stream(). The rows are yielded in the order the server sends them, since sorting them would mean keeping
+# every row in memory.
+def parse_stream(community_boards):
+    for community_board in community_boards:
+        yield extract(community_board)
+
+
+# Helper method to extract the information of a single community board out of its record. Returns a CommunityBoard.
+def extract(community_board):
+    # The JSON file contains the following keys that represent different contact info:
+    cb_borough = ''  # Borough of Community Board.
+    cb_num = ''  # Community Board #.
+    cb_website = ''  # URL to Community Board's Website.
+    cb_email = ''  # Email address of Community Board.
+    cb_chair = ''  # Name of Community Board's Chair.
+    cb_district_manager = ''  # Name of Community Board's District Manager.
+    cb_precincts = ''  # Precinct(s) No. for Community Board.
+    cb_precinct_phone_num = ''  # Precinct(s) Phone Number.
+
+    # If the community board has a key of 'borough', extract the name of the borough.
+    if 'borough' in community_board:
+        cb_borough = community_board['borough']
+    else:
+        cb_borough = 'No Borough Found!'  # If they key doesn't exist, default to no value found.
+
+    # If the community board has a key of 'community_board', extract the number of the community board.
+    if 'community_board' in community_board:
+        cb_num = community_board['community_board']
+    else:
+        cb_num = 'No Community Board Number found!'  # If they key doesn't exist, default to no value found.
+
+    # If the community board has a key of 'cb_website', extract the website of the community board.
+    if 'cb_website' in community_board and community_board['cb_website']['url']:
+        cb_website = community_board['cb_website']['url']  # Get the URL to the community board.
+    else:
+        cb_website = "No website URL found!"  # If they key doesn't exist, default to no value found.
+
+    # If the community board has a key of 'cb_office_email', extract the email address of the community board.
+    if 'cb_office_email' in community_board:
+        cb_email = community_board['cb_office_email']
+    else:
+        cb_email = "No Email found!"  # If they key doesn't exist, default to no value found.
+
+    # If the community board has a key of 'cb_chair', extract the chairperson's name.
+    if 'cb_chair' in community_board:
+        cb_chair = community_board['cb_chair']
+    else:
+        cb_chair = "No info found!"  # If they key doesn't exist, default to no value found.
+
+    # If the community board has a key of 'cb_district_manager', extract the district manager's name.
+    if 'cb_district_manager' in community_board:
+        cb_district_manager = community_board['cb_district_manager']  # Grab the district manager's name.
+    else:
+        cb_district_manager = "No info found!"  # If they key doesn't exist, default to no value found.
+
+    # If the community board has a key of 'cb_office_address', extract the street address. The address, phone and fax
+    # numbers are kept apart, and only joined into a single block of text when the board is exported.
+    cb_office_address = community_board.get('cb_office_address')
+
+    # If the community board has a key of 'cb_office_phone', extract the office phone number.
+    cb_office_phone = community_board.get('cb_office_phone')
+
+    # If the community board has a key of 'cb_office_fax', extract the office fax number.
+    cb_office_fax = community_board.get('cb_office_fax')
+
+    # If the community board has a key of 'cb_precinct_s', extract the precinct number(s).
+    if 'cb_precinct_s' in community_board:
+        cb_precincts = community_board['cb_precinct_s']
+    else:
+        # If they key doesn't exist, default to no value found.
+        cb_precincts = "No precincts found!"
+
+    # If the community board has a key of 'cb_precinct_phone_s', extract the phone number(s) for the precinct(s).
+    if 'cb_precinct_phone_s' in community_board:
+        cb_precinct_phone_num = community_board['cb_precinct_phone_s']
+    else:
+        # If they key doesn't exist, default to no value found.
+        cb_precinct_phone_num = "No precinct phone number found!"
+
+    # Extraction of data complete! Return the board.
+    return CommunityBoard(cb_borough.strip(), cb_num.strip(), cb_website.strip(), cb_email.strip(), cb_chair.strip(),
+                          cb_district_manager.strip(), cb_office_address, cb_office_phone, cb_office_fax,
+                          cb_precincts.strip(), cb_precinct_phone_num.strip())
+
+
+# Request only the records of NYC's Community Boards that changed since the last run, merge them into the local copy of
+# the dataset, and export the merged records, sorted. Nothing is exported if no record changed since the last run.
+# The local copy, with its new high-water mark, is only saved once the export succeeded, so if the export fails, the
+# next run requests the same changes again.
+def export_delta(borough=None, token=None, diff=False, database=None, formats=None):
+    path = delta_path(borough)
+    with metrics.stage('fetch'):
+        community_boards, changed, table = fetch_delta(path, borough=borough, token=token)
+    if changed:
+        with metrics.stage('extract'):
+            boards = parse(community_boards)
+        export_data(boards, diff=diff, database=database, prune=not borough, formats=formats)
+    else:
+        print('No Community Board changed since the last run. Nothing exported.')
+    socrata.save_table(path, table)
 
 
 # Helper method to export the extracted data to .csv file and a .xlsx file.
-def export_data(lst):
-    # Headers for the Excel file to describe the columns of the data.
-    headers = ['Borough', 'Community Board Number', 'Community Board Website', 'Community Board Email',
-               'Community Board Chair', 'Community Board District Manager',
-               'Community Board Address and Phone Number(s)', 'Precinct No.(s)', 'Precinct(s) Phone Number(s)']
-
-    # Datetime objects to grab both the data and time the script was executed.
-    datetime_obj = dt.datetime.now().strftime("%Y-%m-%d %H%M")  # Date is saved in YYYY/MM/DD HHMM format.
-
-    # Data filtered and extracted. Export the info into .csv file.
-    with open('NYC Community Board ' + datetime_obj + ".csv", 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(headers)
-        for cb in lst:
-            writer.writerow(cb)  # Append the data we extracted from earlier to .csv file.
-
-    # Data filtered, extracted, and now needs to be exported as .xlsx file.
-    wb = xl.Workbook()  # Create an Excel workbook.
-    ws = wb.active  # Create a sheet within the workbook.
-    ws.title = "Community Boards"  # Name the worksheet: Community Boards.
-    ws.append(headers)  # Add the column names to the sheet.
-
-    # For each community board we extracted, write to the Excel sheet.
-    for cb in lst:
-        ws.append(cb)
-
-    # Adjust column size by max length of cell length for readable convenience.
-    for column_cells in ws.columns:
-        length = max(len(str(cell.value)) for cell in column_cells)
-        ws.column_dimensions[column_cells[0].column_letter].width = length
-
-    # Save the file.
-    wb.save(filename='NYC Community Board ' + datetime_obj + ".xlsx")
-
-    # Let the user know that the data has been exported
-    print("Program complete!")
-    print("Data outputted to (as a .csv) :", 'NYC Community Board ' + datetime_obj + ".csv")
-    print("Data outputted to (as a .xlsx) :", 'NYC Community Board ' + datetime_obj + ".xlsx")
+# If only some records were scraped, prune is turned off so the other records saved to the database are kept.
+def export_data(lst, diff=False, database=None, prune=True, formats=None):
+    # Streamed records can only be read once, but they're read again to be saved to the database, which holds all of
+    # them at once anyway.
+    if database:
+        lst = list(lst)
+    csv_path, paths = export.export_data(file_name, sheet_title, headers, lst, formats=formats)
+    export.finish_export(file_name, headers, key_columns, lst, csv_path, diff=diff, database=database, prune=prune)
 
 
 if __name__ == "__main__":
@@ -1,148 +1,159 @@
-from bs4 import BeautifulSoup
-import requests
-import csv
-import datetime as dt
-import openpyxl as xl
+import os
 import sys
 
-user_agent = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-                            'Chrome/103.0.0.0 Safari/537.36'}
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import arguments
+from dot_officials import client
+from dot_officials import export
+from dot_officials import memo
+from dot_officials import metrics
+from dot_officials import records
+from dot_officials import specs
+from dot_officials import store
+
 congressional_districts_url = 'https://www.house.gov/representatives'
+states = ['New York']  # States whose representatives are extracted. Every other state's table is skipped.
+file_name = 'Congressional Districts'  # Name of the exported files, followed by the date and time.
+sheet_title = 'Congressional Districts'  # Name of the worksheet in the exported .xlsx file.
+# Version of the extraction below. Bump it whenever the extracted fields change, so the rows memoized from earlier
+# runs are extracted again.
+extractor_version = 1
+
+# Headers for the Excel file to describe the columns of the data.
+headers = ["District No.", "Name", "Party", "Committee Assignment", "URL", "Office Room #", "Phone Number"]
+key_columns = ['District No.']  # Columns that identify a record when comparing against the previous export.
+
+
+# Helper method to reformat a name from Last Name, First Name to First Name Last Name.
+def first_last(name):
+    return ' '.join(name.strip().split(',')[::-1]).strip()  # Split on the comma and reverse the list.
+
+
+# Helper method to separate the committee assignments with commas instead of '|'.
+def join_committees(committees):
+    return ', '.join(committees.strip().split('|')).strip()
+
+
+# The name of the state of a table of representatives, found in the caption of the table.
+caption_spec = specs.Spec([specs.Field('caption', default='')])
+
+
+# Helper method to get the name of the state of a table of representatives.
+def table_state(table):
+    return caption_spec.extract(table)[0]
+
+
+# Helper method to check if a table holds the representatives of one of the states we are looking for.
+def is_wanted_state(table):
+    return table_state(table) in states
+
+
+# Fields extracted from each row of a state's table of representatives, in the order of the columns.
+# Data will be stored in the following format:
+# ["District No.", "Name", "Party", "Committee Assignment", "URL", "Office Room #", "Phone Number"]
+rep_spec = specs.Spec([
+    specs.Field('td.views-field-value-2'),  # Representative's District Number.
+    specs.Field('td.views-field-value-4', post=first_last),  # Representative's Name.
+    specs.Field('td.views-field-value-7'),  # Representative's Party.
+    specs.Field('td.views-field-markup', post=join_committees),  # Representative's Committee Assignments.
+    specs.Field('td.views-field-value-4 a', attr='href'),  # Representative's Website.
+    specs.Field('td.views-field-value-8'),  # Representative's Office Number.
+    specs.Field('td.views-field-value-10'),  # Representative's Phone Number.
+], rows='tr')
 
 
+# A House Representative. The district number is parsed once, when the representative is built.
+class Representative(records.Record):
+    __slots__ = ('district', 'district_label', 'name', 'party', 'committees', 'url', 'office_room', 'phone')
+
+    def __init__(self, district_label, name, party, committees, url, office_room, phone):
+        self.district = store.number(district_label)
+        self.district_label = district_label
+        self.name = name
+        self.party = party
+        self.committees = committees
+        self.url = url
+        self.office_room = office_room
+        self.phone = phone
+
+    def row(self):
+        return [self.district_label, self.name, self.party, self.committees, self.url, self.office_room, self.phone]
+
+
+# Request, extract, and export the information regarding NYS's House Representatives.
 def main():
-    # Test if we can access the site. If there are any errors being thrown, exit the program.
+    options = arguments.parse_args("Scrape the contact information of NYS's House Representatives.")
+    metrics.run(file_name, lambda: export_data(scrape(), diff=options.diff, database=options.store,
+                                               formats=options.formats),
+                profile=options.profile)
+
+
+# Request and extract the information regarding NYS's House Representatives. Returns the representatives.
+# If the directory was already requested with fetch_listing(), it can be given so it isn't requested again.
+def scrape(listing=None):
+    with metrics.stage('fetch'):
+        pages = fetch() if listing is None else listing
+    with metrics.stage('extract'):
+        return parse(pages)
+
+
+# Request the House directory of representatives. Returns the contents of the page.
+def fetch():
+    # Test if we can access the site. If the site still can't be reached after retrying, exit the program.
     try:
-        request = requests.get(congressional_districts_url, headers=user_agent)
-    except:
+        request = client.get(congressional_districts_url)
+    except client.FetchError:
         sys.exit('Invalid URL. Verify the NYS Congressional link!')
+    return request.content
+
+
+# The House directory is the only page requested, so it's also the listing checked by the refresh service.
+fetch_listing = fetch
+
 
-    # Go to the site and get the HTML contents.
-    html_text = request.text
-    soup = BeautifulSoup(html_text, 'lxml')
+# Fingerprint of the tables of the states we are looking for, used by the refresh service to skip the export when
+# nothing changed since the last refresh. Changes to the tables of the other states are ignored.
+def fingerprint(listing):
+    return specs.fingerprint(specs.parse_elements(listing, 'table', 'table', keep=is_wanted_state))
 
-    # Find all the state's representatives information that is stored in tables.
-    reps_by_state = soup.find_all('table', class_='table')
 
-    # Variable to store New York State's representative information.
-    nys_rep_table = None
+# Extract the information regarding the House Representatives out of the page returned by fetch().
+# A directory that didn't change since an earlier run isn't parsed again: its rows are read back from the memo. The
+# states we are looking for are part of the version, so changing them extracts the rows again.
+# Returns the representatives, in the order of the tables.
+def parse(content):
+    version = f'{extractor_version}-' + '-'.join(state.replace(' ', '') for state in states)
+    return [Representative(*rep_data) for rep_data in memo.extract('house-listing', version, content, parse_tables)]
 
-    # Iterate through all the tables by states and look for the table that has information on New York.
-    for state in reps_by_state:
-        if state.find("caption").text.strip() == 'New York':
-            # Found the table! Set the variable to the table that has the information.
-            nys_rep_table = state
 
-    # Next find the rows within the NYS Table. Each row is a NYS House Representative.
-    nys_reps = nys_rep_table.find_all("tr")[1::]
+# Helper method to extract the rows of the tables of the states we are looking for, out of the House directory.
+def parse_tables(content):
+    # Only the tables of the states we are looking for are built; the rest of the page, including every other state's
+    # table, is thrown away as it's parsed.
+    state_tables = specs.parse_elements(content, 'table', 'table', keep=is_wanted_state)
+
+    # Put the tables in the same order as the states we are looking for.
+    state_tables.sort(key=lambda table: states.index(table_state(table)))
 
     # Initialize an array that will hold arrays of extracted data for each respective representative.
     extracted_data = []
 
-    # For each representative in the table rows, extract the information.
-    for rep in nys_reps:
-        # Grab all the data cells in the row abot the representative.
-        rep_info = rep.find_all('td')
-
-        # Initialize an empty array to store the extracted information.
-        # Data will be stored in the following format:
-        # ["District No.", "Name", "Party", "Committee Assignment", "URL", "Office Room #", "Phone Number"]
-        rep_data = []
-
-        # Data we are looking to extract from the Website:
-        district = ''  # Representative's District Number.
-        rep_name = ''  # Representative's Name.
-        rep_link = ''  # Representative's Website.
-        rep_party = ''  # Representative's Party.
-        rep_office = ''  # Representative's Office Number.
-        rep_phone = ''  # Representative's Phone Number.
-        rep_committee_assignment = ''  # Representative's Committee Assignments.
-
-        # For each data cell in list of information, extract the data.
-        for info in rep_info:
-            # If the class name of data cell has 'views-field-value-2', extract the District Number.
-            if 'views-field-value-2' in info['class']:
-                district = info.text.strip()  # Grab the text and remove extra whitespaces.
-
-            # If the class name of data cell has 'views-field-value-4', extract the Name and Link.
-            if 'views-field-value-4' in info['class']:
-                # The name is formatted with by Last Name, First Name.
-                name = info.text.strip().split(',')[::-1]  # Split on the comma and reverse the list.
-                rep_name = ' '.join(name).strip()  # Now the name is formatted as First Name and Last Name.
-
-                # The link for the representative can be found in hyperlink.
-                rep_link = info.find('a')['href'].strip()  # Get the href value for the link and strip the whitespace.
-
-            # If the class name of data cell has 'views-field-value-7', extract the Party.
-            if 'views-field-value-7' in info['class']:
-                rep_party = info.text.strip()  # Get the party affiliation of the representative.
-
-            # If the class name of data cell has 'views-field-value-8', extract the Rep Office.
-            if 'views-field-value-8' in info['class']:
-                rep_office = info.text.strip()  # Get the office number of the representative and strip the whitespace.
-
-            # If the class name of date cell has views-field-value-10, extract the Phone Number.
-            if 'views-field-value-10' in info['class']:
-                rep_phone = info.text.strip()  # Get the phone number of the representative and strip the whitespace.
-
-            # If the class name of the data cell has 'views-field-markup' --> Committee Assignment.
-            if 'views-field-markup' in info['class']:
-                committees = info.text.strip().split("|")
-                rep_committee_assignment = ', '.join(committees).strip()
-
-        # Add all the extracted data into the array.
-        rep_data = rep_data + [district, rep_name, rep_party, rep_committee_assignment, rep_link, rep_office, rep_phone]
-
-        # Go through the array and look for empty values. This means we were unable to find the info we are looking for.
-        for n in range(len(rep_data)):
-            # If the string is empty, set the string to display that no information was found.
-            if not rep_data[n]:
-                rep_data[n] = 'No info found.'
-
-        # Append the info extracted for the representative to list of extracted data.
-        extracted_data.append(rep_data)
-
-    # We have finished extracting the data for the representatives, export the data into a .csv file and .xlsx file.
-    export_data(extracted_data)
+    for state_table in state_tables:
+        # Next find the rows within the state's table. Each row is a House Representative.
+        reps = rep_spec.rows(state_table)[1::]
+
+        # For each representative in the table rows, extract the information in a single pass over the row.
+        # If a value is empty, the spec sets it to display that no information was found.
+        extracted_data.extend(rep_spec.extract(rep) for rep in reps)
+
+    return extracted_data
 
 
 # Helper method to export the extracted data to .csv file and a .xlsx file.
-def export_data(lst):
-    # Headers for the Excel file to describe the columns of the data.
-    headers = ["District No.", "Name", "Party", "Committee Assignment", "URL", "Office Room #", "Phone Number"]
-
-    # Datetime objects to grab both the data and time the script was executed.
-    datetime_obj = dt.datetime.now().strftime("%Y-%m-%d %H%M")  # Date is saved in YYYY/MM/DD HHMM format.
-
-    # Data filtered and extracted. Export the info into .csv file.
-    with open('Congressional Districts ' + datetime_obj + ".csv", 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(headers)
-        for district in lst:
-            writer.writerow(district)  # Append the data we extracted from earlier to .csv file.
-
-    # Data filtered, extracted, and now needs to be exported as .xlsx file
-    wb = xl.Workbook()  # Create an Excel workbook.
-    ws = wb.active  # Create a sheet within the workbook.
-    ws.title = "Congressional Districts"  # Name the worksheet: Congressional Districts.
-    ws.append(headers)  # Add the column names to the sheet.
-
-    # For each district we extracted, write to the Excel sheet.
-    for district in lst:
-        ws.append(district)
-
-    # Adjust column size by max length of cell length for readable convenience.
-    for column_cells in ws.columns:
-        length = max(len(str(cell.value)) for cell in column_cells)
-        ws.column_dimensions[column_cells[0].column_letter].width = length
-
-    # Save the file:
-    wb.save(filename='Congressional Districts ' + datetime_obj + ".xlsx")
-
-    # Let the user know that the data has been exported
-    print("Program complete!")
-    print("Data outputted to (as a .csv) :", 'Congressional Districts ' + datetime_obj + ".csv")
-    print("Data outputted to (as a .xlsx) :", 'Congressional Districts ' + datetime_obj + ".xlsx")
+def export_data(lst, diff=False, database=None, formats=None):
+    csv_path, paths = export.export_data(file_name, sheet_title, headers, lst, formats=formats)
+    export.finish_export(file_name, headers, key_columns, lst, csv_path, diff=diff, database=database)
 
 
 if __name__ == "__main__":
@@ -1,161 +1,178 @@
-from bs4 import BeautifulSoup
-import requests
-import csv
-import datetime as dt
-import openpyxl as xl
+import os
 import sys
 
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import arguments
+from dot_officials import client
+from dot_officials import export
+from dot_officials import journal
+from dot_officials import limiter
+from dot_officials import memo
+from dot_officials import metrics
+from dot_officials import records
+from dot_officials import specs
+from dot_officials import store
+
 nyc_council_URL = 'https://council.nyc.gov/districts/'
-user_agent = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-                            'Chrome/103.0.0.0 Safari/537.36'}
+# Limits of council.nyc.gov: at most 8 district pages in flight and 10 requests per second. The limiter finds the best
+# pace within them.
+site_limits = {'max_concurrency': 8, 'max_rate': 10}
+file_name = 'Council Members & Districts'  # Name of the exported files, followed by the date and time.
+sheet_title = 'Council Members Info'  # Name of the worksheet in the exported .xlsx file.
+# Version of the extraction below. Bump it whenever the extracted fields change, so the rows memoized from earlier
+# runs are extracted again.
+extractor_version = 1
+
+# Headers for the Excel file to describe the columns of the data.
+headers = ['District No.', 'District Website', 'District Office Info', 'Name', 'Borough', 'Party', 'Neighborhoods',
+           'Email']
+key_columns = ['District No.']  # Columns that identify a record when comparing against the previous export.
+
+# Fields extracted from each row of the table that contains all Council members, in the order of the columns.
+# Data will be formatted as the following:
+# [District No., District Website, Name, Borough, Party, Neighborhoods, Email]
+# The district office is extracted from the district's website and added as the third column afterwards.
+district_spec = specs.Spec([
+    specs.Field('td.sort-district'),                            # District number
+    specs.Field('td.sort-member a', attr='href'),               # District's Website
+    specs.Field('td.sort-member'),                              # Community member's name.
+    specs.Field('td.sort-borough', default='No info found'),    # Community member's borough.
+    specs.Field('td.sort-party'),                               # Community member's party.
+    specs.Field('td.sort-neighborhoods'),                       # Community member's neighborhoods.
+    # If the member has no email cell, the email is left empty.
+    specs.Field('td.sort-email span', attr='data-email', missing=''),  # Community member's email address.
+], rows='tbody.list tr')
+
+# Field extracted from the district's website: the paragraph with the address(es) and phone number(s).
+office_spec = specs.Spec([specs.Field('p.text-small', post=specs.keep, default='No info found!')])
+
+
+# A Council member. The district number and the borough are parsed once, when the member is built. The borough is
+# None if the table didn't name one of the five boroughs.
+class CouncilMember(records.Record):
+    __slots__ = ('district', 'district_label', 'website', 'office', 'name', 'borough', 'borough_label', 'party',
+                 'neighborhoods', 'email')
+
+    def __init__(self, district_label, website, office, name, borough_label, party, neighborhoods, email):
+        self.district = store.number(district_label)
+        self.district_label = district_label
+        self.website = website
+        self.office = office
+        self.name = name
+        self.borough = records.Borough.parse(borough_label)
+        self.borough_label = borough_label
+        self.party = party
+        self.neighborhoods = neighborhoods
+        self.email = email
+
+    def row(self):
+        return [self.district_label, self.website, self.office, self.name, self.borough_label, self.party,
+                self.neighborhoods, self.email]
+
+    # The district office is only found as a block of text on the district's website, so it's split into its parts.
+    def contacts(self):
+        return store.email_contacts(self.email) + store.split_contacts(self.office)
+
+
+# Helper method to extract the rows of the table of Council members. A table that didn't change since an earlier run
+# isn't parsed again: its rows are read back from the memo.
+def extract_districts(listing):
+    return memo.extract('council-listing', extractor_version, listing,
+                        lambda html: district_spec.extract_all(specs.parse_html(html)))
+
+
+# Helper method to extract the district office out of a district's website, also memoized.
+def extract_office(html):
+    return memo.extract('council-office', extractor_version, html,
+                        lambda html: office_spec.extract(specs.parse_html(html))[0])
+
+
+# Request, extract, and export the information regarding NYC's Council Members.
+def main():
+    options = arguments.parse_args("Scrape the contact information of NYC's Council Members.")
+    metrics.run(file_name, lambda: export_data(scrape(), diff=options.diff, database=options.store,
+                                               formats=options.formats),
+                profile=options.profile)
 
 
-def main():
-    # Test if we can access the site. If there are any errors being thrown, exit the program.
+# Request and extract the information regarding NYC's Council Members. Returns the Council members.
+# If the table of Council members was already requested with fetch_listing(), it can be given so it isn't requested
+# again.
+def scrape(listing=None):
+    with metrics.stage('fetch'):
+        pages = fetch(listing)
+    with metrics.stage('extract'):
+        return parse(pages)
+
+
+# Request the table of Council members. Returns the HTML of the table.
+def fetch_listing():
+    # Test if we can access the site. If the site still can't be reached after retrying, exit the program.
     try:
-        request = requests.get(nyc_council_URL, headers=user_agent)
-    except:
+        request = client.get(nyc_council_URL)
+    except client.FetchError:
         sys.exit('Invalid URL. Verify the Council Members link!')
+    return request.text
+
+
+# Fingerprint of the rows of the table of Council members, used by the refresh service to skip the district websites
+# and the export when nothing changed since the last refresh.
+def fingerprint(listing):
+    return specs.fingerprint(district_spec.rows(specs.parse_html(listing)))
 
-    # Go to the site and get the contents of the HTML.
-    html_text = request.text
-    soup = BeautifulSoup(html_text, 'lxml')
-
-    # Grab the table that contains all Council members.
-    district_table = soup.find('tbody', class_='list')
-
-    # Grab the rows that contain the information regarding the Council ,embers.
-    district_rows = district_table.find_all('tr')
-
-    # Initialize am array that will hold arrays of extracted data for each Council member.
-    extracted_data = []
-
-    # For each district in our rows of district:
-    for district in district_rows:
-
-        # Initialize an empty array to store the extracted information.
-        # Data will be formatted as the following:
-        # [District No., District Website, District Office Info, Name, Borough, Party, Neighborhoods, Email]
-        cm_data = []
-
-        # Data we are looking to extract from the Website:
-        district_num = ''           # District number
-        district_url = ''           # District's Website
-        district_office = ''        # District office address.
-        cm_name = ''                # Community member's name.
-        cm_borough = ''             # Community member's borough.
-        cm_party = ''               # Community member's party.
-        cm_neighborhoods = ''       # Community member's neighborhoods.
-        cm_email = ''               # Community member's email address.
-
-        # If we find a data cell with a class of 'sort-district', extract the district number.
-        if district.find('td', class_='sort-district'):
-            district_num = district.find('td', class_='sort-district').text.strip()
-        else:
-            district_num = 'No info found.'     # If the element doesn't exist, then default to no value found.
-
-        # If we find a data cell with a class of 'sort-member', then extract the council member's name.
-        if district.find('td', class_='sort-member'):
-            cm_name = district.find('td', class_='sort-member').text.strip()
-
-            # If we find a data cell with a class of 'sort-member' and hyperlink, then extract the district's website.
-            if district.find('td', class_='sort-member').find('a')['href']:
-                district_url = district.find('td', class_='sort-member').find('a')['href'].strip()
-                # Get the HTML contents of the district's website.
-                request = requests.get(district_url, headers=user_agent)
-                if not request.ok:
-                    district_office = 'No info found! ' # If the element doesn't exist, then default to no value found.
-                html_text = request.text
-                cm_soup = BeautifulSoup(html_text, 'lxml')
-
-                # If we find a paragraph with a class of 'text-small', then extract the address(es) and phone number(s).
-                if cm_soup.find('p', class_='text-small'):
-                    district_office = cm_soup.find('p', class_='text-small').text
-                else:
-                    district_office = 'No info found!'  # If the element doesn't exist, then default to no value found.
-            else:
-                district_url = 'No info found.'         # If the element doesn't exist, then default to no value found.
-        else:
-            # If the element doesn't exist, default to no value found.
-            cm_name = 'No info found.'
-            district_url = 'No info found.'
-            district_office = 'No info found.'
-
-        # If we find a data cell with a class of 'sort-borough', then extract the borough(s) the member represents.
-        if district.find('td', class_='sort-borough'):
-            cm_borough = district.find('td', class_='sort-borough').text.strip()
-        else:
-            cm_borough = 'No info found'            # If the element doesn't exist, then default to no value found.
-
-        # If we find a data cell with a class of 'sort-party', then extract the part affiliation of the member.
-        if district.find('td', class_='sort-party'):
-            cm_party = district.find('td', class_='sort-party').text.strip()
-        else:
-            cm_party = 'No info found.'             # If the element doesn't exist, then default to no value found.
-
-        # If we find a data cell with a class of 'sort-neighborhoods', then extract the neighborhoods.
-        if district.find('td', class_='sort-neighborhoods'):
-            cm_neighborhoods = district.find('td', class_='sort-neighborhoods').text.strip()
-        else:
-            cm_neighborhoods = 'No info found.'     # If the element doesn't exist, then default to no value found.
-
-        # If we find a data cell with a class of 'sort-email', then check if they have email address listed.
-        if district.find('td', class_='sort-email'):
-            # If we find a span element with a value of 'data-email', then extract the email address.
-            if district.find('td', class_='sort-email').find('span')['data-email']:
-                cm_email = district.find('td', class_='sort-email').find('span')['data-email'].strip()
-            else:
-                cm_email = 'No info found.'          # If the element doesn't exist, then default to no value found.
 
-        # Add all the extracted data into the array.
-        cm_data = cm_data + [district_num, district_url, district_office, cm_name, cm_borough, cm_party,
-                             cm_neighborhoods, cm_email]
+# Request the table of Council members, unless it's given, and each district's website.
+# Returns the HTML of the table and a dictionary with the HTML of each district's website, by URL. Websites that
+# couldn't be fetched are left out.
+def fetch(listing=None):
+    limiter.configure(nyc_council_URL, **site_limits)
+    if listing is None:
+        listing = fetch_listing()
+
+    # Find the URL of each district's website.
+    districts = extract_districts(listing)
+    district_urls = [district[1] for district in districts if district[1] != specs.no_info]
+
+    # Go to each district's website. The pages are fetched in parallel, as fast as the limiter of the site allows. Each
+    # page is written to the progress journal once it's done, so if the run stops halfway, the next run only fetches
+    # the pages that are missing.
+    websites = journal.fetch_details(journal.Journal(file_name), district_urls)
+
+    return listing, websites
+
+
+# Extract the information regarding NYC's Council Members out of the pages returned by fetch().
+# Returns the Council members, in the order of the table.
+def parse(pages):
+    listing, websites = pages
+
+    # Initialize am array that will hold each Council member.
+    members = []
+
+    # For each district in our rows of district, extract the fields in a single pass over the row:
+    for district in extract_districts(listing):
+        # Add the district office after the district's website. If the member has no website, there is no office.
+        cm_data = district[:2] + [specs.no_info] + district[2:]
+
+        # If the member has a website, extract the address(es) and phone number(s) from it.
+        if cm_data[1] != specs.no_info:
+            if cm_data[1] in websites:
+                cm_data[2] = extract_office(websites[cm_data[1]])
+            else:
+                cm_data[2] = 'No info found!'  # If the website couldn't be fetched, default to no value found.
 
-        # Append the info extracted for the representative to list of extracted data.
-        extracted_data.append(cm_data)
+        # Build the Council member out of the info extracted for them.
+        members.append(CouncilMember(*cm_data))
 
-    # We have finished extracting the data for the council member, export the data into a .csv file and .xlsx file.
-    export_data(extracted_data)
+    return members
 
 
 # Helper method to export the extracted data to .csv file and a .xlsx file.
-def export_data(extracted_data):
-    # Headers for the Excel file to describe the columns of the data.
-    headers = ['District No.', 'District Website', 'District Office Info', 'Name', 'Borough', 'Party', 'Neighborhoods',
-               'Email']
-
-    # Datetime objects to grab both the data and time the script was executed.
-    datetime_obj = dt.datetime.now().strftime("%Y-%m-%d %H%M")  # Date is saved in YYYY/MM/DD HHMM format.
-
-    # Data filtered and extracted. Export the info into .csv file.
-    with open('Council Members & Districts ' + datetime_obj + ".csv", 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(headers)
-        for cb in extracted_data:
-            writer.writerow(cb)  # Append the data we extracted from earlier to .csv file.
-
-    # Data filtered, extracted, and now needs to be exported as .xlsx file.
-    wb = xl.Workbook()                      # Create an Excel workbook.
-    ws = wb.active                          # Create a sheet within the workbook.
-    ws.title = "Council Members Info"       # Name the worksheet: Senators.
-    ws.append(headers)                      # Add the column names to the sheet.
-
-    # For each council member we extracted, write to the Excel sheet.
-    for cm in extracted_data:
-        ws.append(cm)
-
-    # Adjust column size by max length of cell length for readable convenience.
-    for column_cells in ws.columns:
-        length = max(len(str(cell.value)) for cell in column_cells)
-        ws.column_dimensions[column_cells[0].column_letter].width = length
-
-    # Save the file.
-    wb.save(filename='Council Members ' + datetime_obj + ".xlsx")
-
-    # Let the user know that the data has been exported
-    print("Program complete!")
-    print("Data outputted to (as a .csv) :", 'Council Members ' + datetime_obj + ".csv")
-    print("Data outputted to (as a .xlsx) :", 'Council Members ' + datetime_obj + ".xlsx")
+def export_data(lst, diff=False, database=None, formats=None):
+    csv_path, paths = export.export_data(file_name, sheet_title, headers, lst, xlsx_name='Council Members',
+                                         formats=formats)
+    export.finish_export(file_name, headers, key_columns, lst, csv_path, diff=diff, database=database)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import lookup
+
+if __name__ == "__main__":
+    lookup.main()
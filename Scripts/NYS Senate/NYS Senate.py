@@ -1,183 +1,216 @@
-from bs4 import BeautifulSoup
-import requests
-import csv
-import datetime as dt
-import openpyxl as xl
+from collections import namedtuple
+import os
 import sys
 
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import arguments
+from dot_officials import client
+from dot_officials import export
+from dot_officials import journal
+from dot_officials import limiter
+from dot_officials import memo
+from dot_officials import metrics
+from dot_officials import records
+from dot_officials import specs
+from dot_officials import store
+
 nys_senate_URL = 'https://www.nysenate.gov/senators-committees'
 senate_template_url = 'https://www.nysenate.gov'
-user_agent = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-                            'Chrome/103.0.0.0 Safari/537.36'}
+# Limits of nysenate.gov: at most 8 contact pages in flight and 10 requests per second. The limiter finds the best
+# pace within them.
+site_limits = {'max_concurrency': 8, 'max_rate': 10}
+file_name = 'NYS Senate'  # Name of the exported files, followed by the date and time.
+sheet_title = 'Senators'  # Name of the worksheet in the exported .xlsx file.
+# Version of the extraction below. Bump it whenever the extracted fields change, so the rows memoized from earlier
+# runs are extracted again.
+extractor_version = 2
+
+# Headers for the Excel file to describe the columns of the data.
+headers = ["District No.", "Name", "Senator's URL", "Party", "Email", "Addresses & Phone Number(s)"]
+key_columns = ['District No.']  # Columns that identify a record when comparing against the previous export.
+
+# Fields extracted from each senator in the list of senators.
+# Data will be stored in the following format: [District Number, Name of Senator, Senator URL, Party Affiliation(s)]
+# The party is left out of the district number and the name, since it can be found inside of them.
+senator_spec = specs.Spec([
+    specs.Field('.nys-senator--district', exclude=['.nys-senator--party']),  # Senator's District Number.
+    specs.Field('.nys-senator--name', exclude=['.nys-senator--party']),  # Senator's Name.
+    specs.Field('a', attr='href', post=lambda href: (senate_template_url + href).strip()),  # Senator's URL.
+    specs.Field('.nys-senator--party'),  # Party Affiliation.
+], rows='div.u-odd, div.u-even')
+
+# Fields extracted from each office in a senator's contact page. An office without a field is left empty.
+office_spec = specs.Spec([
+    specs.Field('[itemprop="streetAddress"]', default=''),  # Street Address.
+    specs.Field('[itemprop="addressLocality"]', default=''),  # City.
+    specs.Field('[itemprop="addressRegion"]', default=''),  # Region.
+    specs.Field('[itemprop="postalCode"]', default=''),  # Postal Code.
+    specs.Field('[itemprop="telephone"]', default=''),  # Telephone Number.
+    specs.Field('[itemprop="faxNumber"]', default=''),  # Fax Number.
+])
+
+
+# An office of a senator, as found on their contact page. A field that wasn't found is left empty.
+Office = namedtuple('Office', ['street', 'locality', 'region', 'postal_code', 'telephone', 'fax'])
+
+
+# Helper method to concat the office address(es) and phone number(s) of a senator into a single string.
+def join_offices(offices):
+    address_lst = ''
+    for street, locality, region, postal_code, telephone, fax in offices:
+        temp_str = ''
+        # Add the Street Address, City, Region, and Postal Code if the full address was found.
+        if street and locality and region and postal_code:
+            temp_str = temp_str + street + '\n' + locality + ' ' + region + ' ' + postal_code + '\n'
+        # Add the Telephone Number.
+        if telephone:
+            temp_str = temp_str + telephone + '\n'
+        # Add the Fax Number.
+        if fax:
+            temp_str = temp_str + fax + '\n'
+        if temp_str:
+            address_lst = address_lst + temp_str + '\n'
+    return address_lst.strip()
+
+
+# Fields extracted from a senator's contact page.
+# Data will be stored in the following format: [Email Address, [Office, ...]]
+contact_spec = specs.Spec([
+    specs.Field('div.c-block--senator-email a'),  # Senator's Email Address.
+    specs.Field('div.vcard', many=True, spec=office_spec, post=specs.keep, default=[]),  # Senator's Offices.
+])
+
+
+# A senator. The district number is parsed once, when the senator is built, and the offices are kept as a list of
+# Office tuples, only joined into a single block of text when the senator is exported.
+class Senator(records.Record):
+    __slots__ = ('district', 'district_label', 'name', 'url', 'party', 'email', 'offices')
+
+    def __init__(self, district_label, name, url, party, email, offices):
+        self.district = store.number(district_label)
+        self.district_label = district_label
+        self.name = name
+        self.url = url
+        self.party = party
+        self.email = email
+        self.offices = tuple(Office(*office) for office in offices)
+
+    def row(self):
+        return [self.district_label, self.name, self.url, self.party, self.email,
+                join_offices(self.offices) or specs.no_info]
+
+    # The contacts are taken from the fields of each office, so the fax numbers, which have no "Fax:" in front of
+    # them, are told apart from the phone numbers.
+    def contacts(self):
+        contacts = store.email_contacts(self.email)
+        for number, office in enumerate(self.offices, start=1):
+            if office.street and office.locality and office.region and office.postal_code:
+                contacts.append((number, 'address', office.street + '\n' + ' '.join(office[1:4])))
+            if office.telephone:
+                contacts.append((number, 'phone', office.telephone))
+            if office.fax:
+                contacts.append((number, 'fax', office.fax))
+        return contacts
+
+
+# Helper method to extract the senators out of the list of senators. A list that didn't change since an earlier run
+# isn't parsed again: its rows are read back from the memo.
+def extract_senators(listing):
+    return memo.extract('senate-listing', extractor_version, listing,
+                        lambda html: senator_spec.extract_all(specs.parse_html(html)))
+
+
+# Helper method to extract the email address and the addresses out of a senator's contact page, also memoized.
+def extract_contact(html):
+    return memo.extract('senate-contact', extractor_version, html,
+                        lambda html: contact_spec.extract(specs.parse_html(html)))
+
+
+# Request, extract, and export the information regarding the NYS Senators.
+def main():
+    options = arguments.parse_args("Scrape the contact information of the NYS Senators.")
+    metrics.run(file_name, lambda: export_data(scrape(), diff=options.diff, database=options.store,
+                                               formats=options.formats),
+                profile=options.profile)
 
 
-def main():
-    # Test if we can access the site. If there are any errors being thrown, exit the program.
+# Request and extract the information regarding the NYS Senators. Returns the senators, sorted by district.
+# If the list of senators was already requested with fetch_listing(), it can be given so it isn't requested again.
+def scrape(listing=None):
+    with metrics.stage('fetch'):
+        pages = fetch(listing)
+    with metrics.stage('extract'):
+        return parse(pages)
+
+
+# Request the list of senators. Returns the HTML of the list.
+def fetch_listing():
+    # Test if we can access the site. If the site still can't be reached after retrying, exit the program.
     try:
-        request = requests.get(nys_senate_URL, headers=user_agent)
-    except:
+        request = client.get(nys_senate_URL)
+    except client.FetchError:
         sys.exit('Invalid URL. Verify the NYS Senate link!')
+    return request.text
 
-    # Go to the site and get the contents of the HTML.
-    html_text = request.text
-    soup = BeautifulSoup(html_text, 'lxml')
 
-    # Grab all the senators' information.
-    nys_senators = soup.find_all('div', class_='u-odd') + soup.find_all('div', class_='u-even')
+# Fingerprint of the senators in the list of senators, used by the refresh service to skip the contact pages and the
+# export when nothing changed since the last refresh.
+def fingerprint(listing):
+    return specs.fingerprint(senator_spec.rows(specs.parse_html(listing)))
 
-    # Initialize am array that will hold arrays of extracted data for each Senator.
-    extracted_data = []
 
-    # For each senator in the list of senators:
-    for senator in nys_senators:
+# Request the list of senators, unless it's given, and each senator's contact page.
+# Returns the HTML of the list of senators and a dictionary with the HTML of each contact page, by URL. Contact pages
+# that couldn't be fetched are left out.
+def fetch(listing=None):
+    limiter.configure(nys_senate_URL, **site_limits)
+    if listing is None:
+        listing = fetch_listing()
 
-        # Initialize an empty array to store the extracted information.
-        # Data will be stored in the following format:
-        # [District Number, Name of Senator, Senator URL ,Party Affiliation(s), Email Address, and Addresses and Phone
-        # Number(s)]
-        senate_data = []
+    # Find the URL of each senator's contact page.
+    senators = extract_senators(listing)
+    contact_urls = [senate_data[2] + '/contact' for senate_data in senators if senate_data[2] != specs.no_info]
 
-        # Data we are looking to extract from the Website:
-        district_party = ''  # Party Affiliation.
-        district_num = ''  # Senator's District Number.
-        senator_name = ''  # Senator's Name.
-        senator_url = ''  # Senator's URL.
-        senator_email = ''  # Senator's Email Address.
-        address_lst = ''  # Senator's Address.
+    # Go to each senator's contact page. The pages are fetched in parallel, as fast as the limiter of the site allows.
+    # Each page is written to the progress journal once it's done, so if the run stops halfway, the next run only
+    # fetches the pages that are missing.
+    contact_pages = journal.fetch_details(journal.Journal(file_name), contact_urls)
 
-        # Extract the senator's party.
-        if senator.find(class_='nys-senator--party'):
-            district_party = senator.find(class_='nys-senator--party').text.strip()
-        else:
-            district_party = "No info found."  # If the element doesn't exist, default to no value found.
+    return listing, contact_pages
 
-        # Remove the party from HTML Contents. This will make it easier to extract the name and district number.
-        senator.find(class_='nys-senator--party').decompose()
 
-        # If we can find the class that contains 'nys-senator--district', then extract the district number.
-        if senator.find(class_='nys-senator--district'):
-            district_num = senator.find(class_='nys-senator--district').text.strip()
-        else:
-            district_num = 'No info found.'  # If the element doesn't exist, default to no value found.
+# Extract the information regarding the NYS Senators out of the pages returned by fetch().
+# Returns the senators, sorted by district.
+def parse(pages):
+    listing, contact_pages = pages
 
-        # If we can find the class that contains 'nys-senator--name', then extract the senator's name.
-        if senator.find(class_='nys-senator--name'):
-            senator_name = senator.find(class_='nys-senator--name').text.strip()
+    # Grab all the senators' information. The fields of each senator are extracted in a single pass.
+    # The email address and the addresses are added from the senator's contact page.
+    senators = []
+    for senate_data in extract_senators(listing):
+        # Extract the email address and the addresses out of the contact page. If the page couldn't be fetched, extract
+        # an empty page so every field defaults to no value found.
+        contact_page = contact_pages.get(senate_data[2] + '/contact')
+        if contact_page is None:
+            contact = contact_spec.extract(specs.parse_html(''))
         else:
-            senator_name = 'No info found.'  # If the element doesn't exist, default to no value found.
-
-        # Extract the senator's page.
-        senator_url = senate_template_url + senator.find('a')['href']
+            contact = extract_contact(contact_page)
 
-        # Go to the site and get the contents of the HTML.
-        senate_contact_url = senator_url + '/contact'
-        contact_text = requests.get(senate_contact_url, headers=user_agent).text
+        # Finished Extracting Data! Build the senator out of the list and the contact page.
+        senators.append(Senator(*senate_data, *contact))
 
-        senate_soup = BeautifulSoup(contact_text, 'lxml')
+    # Sort the senators by District Number, which was already parsed when each senator was built. Senators without a
+    # district number sort first.
+    senators.sort(key=lambda senator: senator.district or 0)
 
-        # If we can find the class that contains 'nys-senator--name', then extract the senator's email address.
-        if senate_soup.find('div', class_='c-block--senator-email'):
-            senator_email = senate_soup.find('div', class_='c-block--senator-email').find('a').text
-        else:
-            senator_email = 'No info found.'  # If the element doesn't exist, default to no value found.
-
-        # Extract the Office Address(es) and Phone Number(s).
-        if senate_soup.find_all('div', class_='vcard'):
-            contact_data = senate_soup.find_all('div', class_='vcard')
-        else:
-            contact_data = []
-
-        # Initialize string to concat the addresses and phone numbers to.
-        address_lst = ''
-        for address in contact_data:
-            temp_str = ''
-            # Extract the Street Address.
-            if (address.find(itemprop='streetAddress') and address.find(itemprop='addressLocality') and address.find(
-                    itemprop='addressRegion') and address.find(itemprop='postalCode')):
-                temp_str = temp_str + address.find(itemprop="streetAddress").text.strip() + "\n"
-                # Extract the City, Region, and Postal Code.
-                temp_str = temp_str + address.find(itemprop="addressLocality").text.strip() \
-                           + ' ' + address.find(itemprop="addressRegion").text.strip() + ' ' + address.find(
-                    itemprop="postalCode").text.strip() + '\n'
-            # Extract the Telephone Number.
-            if address.find(itemprop="telephone"):
-                temp_str = temp_str + address.find(itemprop="telephone").text.strip() + '\n'
-            # Extract the Fax Number.
-            if address.find(itemprop="faxNumber"):
-                temp_str = temp_str + address.find(itemprop="faxNumber").text.strip() + '\n'
-            if temp_str:
-                address_lst = address_lst + temp_str + '\n'
-
-        # If the address_lst is still empty, there was no address(es) or phone number(s) found.
-        if not address_lst:
-            address_lst = 'No info found.'  # If the element doesn't exist, default to no value found.
-
-        # Finished Extracting Data! Add values to the list in the specified format
-        senate_data.append(district_num.strip())
-        senate_data.append(senator_name.strip())
-        senate_data.append(senator_url.strip())
-        senate_data.append(district_party.strip())
-        senate_data.append(senator_email.strip())
-        senate_data.append(address_lst.strip())
-
-        # Push the senate data into the extracted list
-        extracted_data.append(senate_data)
-
-    # Sort the extracted data by District Number
-    extracted_data.sort(key=lambda x: get_district_num(x[0]))
-
-    # Export the data to the spreadsheets
-    export_data(extracted_data)
-
-
-# Helper sort method to convert string into a number to sort extracted data numerically.
-def get_district_num(txt):
-    num = 0  # The numerical value found in the string.
-    # For each character in the string
-    for char in txt:
-        # If the ASCII value of the character is between 48 and 57, it's a digit.
-        if 48 <= ord(char) <= 57:
-            num = num * 10 + int(char)  # Parse the character as a number and multiply the number by 10 and add it.
-    return num  # Return the numerical value.
+    return senators
 
 
 # Helper file method to export the extracted data to .csv file and a .xlsx file.
-def export_data(lst):
-    # Headers for the Excel file to describe the columns of the data.
-    headers = ["District No.", "Name", "Senator's URL", "Party", "Email", "Addresses & Phone Number(s)"]
-
-    # Datetime objects to grab both the data and time the script was executed.
-    datetime_obj = dt.datetime.now().strftime("%Y-%m-%d %H%M")  # Date is saved in YYYY/MM/DD HHMM format.
-
-    # Data filtered and extracted. Export the info into .csv file.
-    with open('NYS Senate ' + datetime_obj + ".csv", 'w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(headers)
-        for senator in lst:
-            writer.writerow(senator)  # Append the data we extracted from earlier to .csv file.
-
-    # Data filtered, extracted, and now needs to be exported as .xlsx file.
-    wb = xl.Workbook()  # Create an Excel workbook.
-    ws = wb.active  # Create a sheet within the workbook.
-    ws.title = "Senators"  # Name the worksheet: Senators.
-    ws.append(headers)  # Add the column names to the sheet.
-
-    # For each community board we extracted, write to the Excel sheet.
-    for senator in lst:
-        ws.append(senator)
-
-    # Adjust column size by max length of cell length for readable convenience.
-    for column_cells in ws.columns:
-        length = max(len(str(cell.value)) for cell in column_cells)
-        ws.column_dimensions[column_cells[0].column_letter].width = length
-
-    # Save the file.
-    wb.save(filename='NYS Senate ' + datetime_obj + ".xlsx")
-
-    # Let the user know that the data has been exported
-    print("Program complete!")
-    print("Data outputted to (as a .csv) :", 'NYS Senate ' + datetime_obj + ".csv")
-    print("Data outputted to (as a .xlsx) :", 'NYS Senate ' + datetime_obj + ".xlsx")
+def export_data(lst, diff=False, database=None, formats=None):
+    csv_path, paths = export.export_data(file_name, sheet_title, headers, lst, formats=formats)
+    export.finish_export(file_name, headers, key_columns, lst, csv_path, diff=diff, database=database)
 
 
 if __name__ == "__main__":
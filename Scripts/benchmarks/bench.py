@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import client
+from dot_officials import export
+from dot_officials import journal
+from dot_officials import memo
+from dot_officials import sources
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+fixtures_dir = os.path.join(benchmarks_dir, 'fixtures')  # Pages saved with --record.
+baselines_path = os.path.join(benchmarks_dir, 'baselines.json')  # Results saved by --update-baselines.
+repeat = 5  # Number of times each benchmark is run. The fastest run is kept.
+tolerance = 0.25  # How much slower than the baseline a benchmark can get before it's flagged as a regression.
+
+
+# Fetch every page the scrapers need from the live sites and save them as fixtures.
+def record(names):
+    client.record(fixtures_dir)
+    for name in names:
+        module = sources.load(name)
+        journal.clear(module.file_name)  # Or the detail pages fetched by a previous run wouldn't be recorded.
+        module.fetch()
+        journal.clear(module.file_name)
+        print(f'Recorded {name}')
+    print('Fixtures saved to', fixtures_dir)
+
+
+# Helper method to time a method. Returns the fastest time of a single call, in seconds.
+# Each run calls the method enough times to take at least 0.2 seconds, so small tables are still timed accurately.
+def best_time(method):
+    timer = timeit.Timer(method)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+# Replay the fixtures of a source and time how fast its pages are parsed and its rows are exported.
+def bench_source(name, directory):
+    module = sources.load(name)
+    # The detail pages are written to the progress journal of the script as they're fetched. The journal is cleared
+    # before, so the pages are replayed from the fixtures, and after, so no progress file is left behind.
+    journal.clear(module.file_name)
+    pages = module.fetch()
+    journal.clear(module.file_name)
+    rows = module.parse(pages)
+
+    csv_path = os.path.join(directory, name + '.csv')
+    xlsx_path = os.path.join(directory, name + '.xlsx')
+    parse_time = best_time(lambda: module.parse(pages))
+    csv_time = best_time(lambda: export.write_csv(csv_path, module.headers, rows))
+    # The .xlsx file is streamed from the .csv file, the same way the scripts export it.
+    widths = export.write_csv(csv_path, module.headers, rows)
+    sheet = lambda: [(module.sheet_title, module.headers, export.read_csv(csv_path), widths)]
+    xlsx_time = best_time(lambda: export.write_workbook(xlsx_path, sheet()))
+
+    return {
+        'rows': len(rows),
+        'parse_rows_per_sec': len(rows) / parse_time,
+        'csv_seconds': csv_time,
+        'xlsx_seconds': xlsx_time,
+    }
+
+
+# Helper method to compare a result against its baseline. Returns the names of the measurements that regressed.
+def regressions(result, baseline):
+    regressed = []
+    if result['parse_rows_per_sec'] < baseline['parse_rows_per_sec'] * (1 - tolerance):
+        regressed.append('parse')
+    for measurement in ['csv_seconds', 'xlsx_seconds']:
+        if result[measurement] > baseline[measurement] * (1 + tolerance):
+            regressed.append(measurement.split('_')[0])
+    return regressed
+
+
+# Replay the fixtures of every source, print the results, and flag the regressions against the baselines.
+# Returns True if nothing regressed.
+def run(names, update_baselines):
+    client.replay(fixtures_dir)
+    memo.use_memo = False  # Parse the pages every time, instead of timing how fast the memoized rows are read back.
+    baselines = {}
+    if os.path.exists(baselines_path):
+        with open(baselines_path, encoding='utf-8') as file:
+            baselines = json.load(file)
+
+    results = {}
+    passed = True
+    print(f'{"Source":<18}{"Rows":>6}{"Parse rows/s":>15}{"CSV ms":>10}{"XLSX ms":>10}  Regressions')
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            try:
+                result = bench_source(name, directory)
+            except SystemExit:
+                # The script exits when its page can't be fetched, which means its fixtures weren't recorded.
+                print(f'{name:<18}No fixtures recorded. Run: python bench.py --record {name}')
+                passed = False
+                continue
+            results[name] = result
+            regressed = regressions(result, baselines[name]) if name in baselines else []
+            passed = passed and not regressed
+            print(f'{name:<18}{result["rows"]:>6}{result["parse_rows_per_sec"]:>15,.0f}'
+                  f'{result["csv_seconds"] * 1000:>10.2f}{result["xlsx_seconds"] * 1000:>10.2f}  '
+                  f'{", ".join(regressed) or ("-" if name in baselines else "no baseline")}')
+
+    if update_baselines:
+        baselines.update(results)
+        with open(baselines_path, 'w', encoding='utf-8') as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+        print('Baselines saved to', baselines_path)
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parse and export stages of the scrapers offline.')
+    parser.add_argument('--record', action='store_true',
+                        help='Fetch the live pages and save them as fixtures, instead of replaying the fixtures.')
+    parser.add_argument('sources', nargs='*', help='Sources to benchmark: ' + ', '.join(sources.scripts) +
+                        '. Defaults to every source.')
+    parser.add_argument('--update-baselines', action='store_true', help='Save the results as the new baselines.')
+    args = parser.parse_args()
+    for name in args.sources:
+        if name not in sources.scripts:
+            parser.error(f'unknown source: {name}')
+    names = args.sources or list(sources.scripts)
+
+    if args.record:
+        record(names)
+    elif not run(names, args.update_baselines):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import sources
+from dot_officials import specs
+
+state_count = 56  # Number of tables in the page. The House directory has a table for each state and territory.
+reps_per_state = 30  # Number of rows in each table.
+
+# A row of a state's table of representatives, as found on https://www.house.gov/representatives.
+rep_row = '''
+<tr>
+<td class="views-field views-field-value-2">{n}th</td>
+<td class="views-field views-field-value-4"><a href="https://rep{n}.house.gov/">Last{n}, First{n}</a></td>
+<td class="views-field views-field-value-7">D</td>
+<td class="views-field views-field-value-8">{n} Rayburn</td>
+<td class="views-field views-field-value-10">(202) 225-{n:04d}</td>
+<td class="views-field views-field-markup">Appropriations|Budget</td>
+</tr>'''
+
+
+# Helper method to build a directory page with a table for every state. The last table is New York's.
+def house_page():
+    tables = []
+    for state in range(state_count):
+        caption = 'New York' if state == state_count - 1 else f'State {state}'
+        rows = ''.join(rep_row.format(n=n) for n in range(1, reps_per_state + 1))
+        tables.append(f'<table class="table"><caption>{caption}</caption><thead><tr><th>District</th></tr></thead>'
+                      f'<tbody>{rows}</tbody></table>')
+    return ('<html><body>' + ''.join(tables) + '</body></html>').encode('utf-8')
+
+
+# Parse the whole page into a tree and scan the captions, the way the script did before the targeted parse was added.
+# Both modes use lxml, since the targeted parse only clears the elements as they're parsed with lxml.
+def full_parse(content):
+    module = sources.load('house')
+    for state in specs.parse_html(content, parser='lxml').cssselect('table.table'):
+        if module.table_state(state) == 'New York':
+            return [module.rep_spec.extract(rep) for rep in state.findall('.//tr')[1::]]
+    return []
+
+
+# Parse the page the way the script does now: only New York's table is built.
+def targeted_parse(content):
+    module = sources.load('house')
+    tables = specs.parse_elements(content, 'table', 'table', keep=module.is_wanted_state, parser='lxml')
+    return [module.rep_spec.extract(rep) for rep in tables[0].findall('.//tr')[1::]]
+
+
+# Run a single parse mode and print its time and how much it grew the peak RSS of the process.
+# Each mode runs in its own process, so the peak RSS of one mode doesn't hide the other.
+def run_mode(mode):
+    content = house_page()
+    sources.load('house')
+    specs.parse_html('', parser='lxml')  # lxml is only imported by the first parse, so it's imported before measuring.
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    rows = {'full': full_parse, 'targeted': targeted_parse}[mode](content)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f'{mode:>8} : {elapsed * 1000:8.1f} ms, peak RSS +{(peak - before) / 1024:6.1f} MB, {len(rows)} rows')
+
+
+def main():
+    if len(sys.argv) > 1:
+        run_mode(sys.argv[1])
+        return
+    print(f'Page: {state_count} state tables, {reps_per_state} representatives each')
+    for mode in ['full', 'targeted']:
+        subprocess.run([sys.executable, os.path.abspath(__file__), mode], check=True)
+
+
+if __name__ == "__main__":
+    main()
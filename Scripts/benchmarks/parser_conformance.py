@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import cache
+from dot_officials import client
+from dot_officials import journal
+from dot_officials import memo
+from dot_officials import parsers
+from dot_officials import sources
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+fixtures_dir = os.path.join(benchmarks_dir, 'fixtures')  # Pages saved with bench.py --record.
+# Small set of pages committed along with the scripts, modeled on the pages of each site, with the markup the parsers
+# tend to disagree on: comments, entities, line breaks, and missing elements. pages.json gives the URL of each page.
+pages_dir = os.path.join(benchmarks_dir, 'conformance')
+html_sources = ['house', 'council', 'senate', 'assembly']  # Sources whose pages are HTML. The rest are JSON.
+
+
+# Helper method to save the committed pages to a folder of fixtures, the same way bench.py --record saves them.
+def load_pages(directory):
+    fixtures = cache.ResponseCache(directory, fresh_for=float('inf'), max_age=float('inf'), max_bytes=float('inf'))
+    with open(os.path.join(pages_dir, 'pages.json'), encoding='utf-8') as file:
+        pages = json.load(file)
+    for url, page in pages.items():
+        with open(os.path.join(pages_dir, page), 'rb') as file:
+            fixtures.store(client.full_url(url), SimpleNamespace(headers={}, encoding='utf-8', content=file.read()))
+
+
+# Helper method to replay the fixtures of a source and extract its rows with a parser.
+# Returns the rows and the fastest time taken to fetch and extract them, in seconds. The first run also imports the
+# parser, so it's run twice.
+def extract_rows(name, parser):
+    parsers.use(parser)
+    module = sources.load(name)
+    best = float('inf')
+    for _ in range(2):
+        # The journal is cleared first, so the detail pages are replayed from the fixtures, and no progress file is left
+        # behind.
+        journal.clear(module.file_name)
+        start = time.perf_counter()
+        pages = module.fetch()
+        rows = [list(row) for row in module.parse(pages)]
+        best = min(best, time.perf_counter() - start)
+    journal.clear(module.file_name)
+    return rows, best
+
+
+# Replay the fixtures of every source with every parser, and check that each parser extracts the same rows as the
+# default parser. Returns True if every parser that is installed agrees.
+def run(names, directory):
+    client.replay(directory)
+    memo.use_memo = False  # Extract the rows with each parser, instead of reading back the rows of the first one.
+    others = [parser for parser in parsers.parser_types if parser != parsers.default_parser]
+    passed = True
+    print(f'{"Source":<12}{"Parser":<12}{"Rows":>6}{"ms":>10}  Result')
+    for name in names:
+        try:
+            expected, elapsed = extract_rows(name, parsers.default_parser)
+        except SystemExit:
+            # The script exits when its page can't be fetched, which means its fixtures weren't recorded.
+            print(f'{name:<12}No fixtures recorded. Run: python bench.py --record {name}')
+            passed = False
+            continue
+        print(f'{name:<12}{parsers.default_parser:<12}{len(expected):>6}{elapsed * 1000:>10.1f}  reference')
+
+        for parser in others:
+            try:
+                rows, elapsed = extract_rows(name, parser)
+            except SystemExit as error:
+                print(f'{name:<12}{parser:<12}{"":>6}{"":>10}  skipped: {error}')
+                continue
+            mismatches = [n for n in range(max(len(rows), len(expected)))
+                          if n >= len(rows) or n >= len(expected) or rows[n] != expected[n]]
+            passed = passed and not mismatches
+            print(f'{name:<12}{parser:<12}{len(rows):>6}{elapsed * 1000:>10.1f}  '
+                  f'{"identical" if not mismatches else f"{len(mismatches)} rows differ"}')
+            for n in mismatches[:3]:
+                print(f'    row {n}: {parsers.default_parser}: {expected[n] if n < len(expected) else None}')
+                print(f'    row {n}: {parser}: {rows[n] if n < len(rows) else None}')
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that every HTML parser extracts the same rows out of the '
+                                                 'same pages.')
+    parser.add_argument('sources', nargs='*', help='Sources to check: ' + ', '.join(html_sources) +
+                        '. Defaults to every one of them.')
+    parser.add_argument('--recorded', action='store_true',
+                        help='Check the live pages saved with bench.py --record, instead of the committed pages.')
+    args = parser.parse_args()
+    for name in args.sources:
+        if name not in html_sources:
+            parser.error(f'unknown source: {name}')
+
+    if args.recorded:
+        passed = run(args.sources or html_sources, fixtures_dir)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            load_pages(directory)
+            passed = run(args.sources or html_sources, directory)
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
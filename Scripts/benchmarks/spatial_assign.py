@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from shapely.geometry import box
+
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import spatial
+
+# Bounds of New York City, in degrees of longitude and latitude.
+west, south, east, north = -74.26, 40.49, -73.70, 40.92
+grid_size = 15  # The synthetic districts are a grid_size x grid_size grid of squares over the city.
+
+
+# Helper method to split the city into a grid of square districts, numbered from 1.
+def grid_districts():
+    width = (east - west) / grid_size
+    height = (north - south) / grid_size
+    geometries = [box(west + x * width, south + y * height, west + (x + 1) * width, south + (y + 1) * height)
+                  for x in range(grid_size) for y in range(grid_size)]
+    return geometries, list(range(1, len(geometries) + 1))
+
+
+# Time how fast random points across the city are assigned to the districts of a grid, with the spatial index the
+# District Assignment script uses. Each batch is assigned with a single call.
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the assignment of points to their districts.')
+    parser.add_argument('--points', type=int, default=1000000, help='Number of points to assign.')
+    parser.add_argument('--batch-size', type=int, default=spatial.batch_size, help='Number of points per batch.')
+    args = parser.parse_args()
+
+    index = spatial.DistrictIndex(*grid_districts())
+    generator = np.random.default_rng(0)
+    longitudes = generator.uniform(west, east, args.points)
+    latitudes = generator.uniform(south, north, args.points)
+
+    start = time.perf_counter()
+    assigned = 0
+    for first in range(0, args.points, args.batch_size):
+        batch = slice(first, first + args.batch_size)
+        assigned += int((index.assign(longitudes[batch], latitudes[batch]) >= 0).sum())
+    elapsed = time.perf_counter() - start
+
+    print(f'{args.points:,} points assigned to {grid_size * grid_size} districts in {elapsed:.2f}s: '
+          f'{args.points / elapsed:,.0f} points/s ({assigned:,} inside a district).')
+
+
+if __name__ == "__main__":
+    main()
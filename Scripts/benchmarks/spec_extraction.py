@@ -0,0 +1,100 @@
+from bs4 import BeautifulSoup
+import os
+import sys
+import timeit
+
+# Make the shared helpers found in the Scripts folder importable when running this script directly.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dot_officials import sources
+from dot_officials import specs
+
+row_count = 51  # Number of rows in the listing page. The Council has 51 districts.
+repeat = 20  # Number of times each benchmark is run. The fastest run is reported.
+
+# A row of the Council's table of districts, as found on https://council.nyc.gov/districts/.
+council_row = '''
+<tr>
+<td class="sort-district">{n}</td>
+<td class="sort-member"><a href="https://council.nyc.gov/district-{n}/">Member {n}</a></td>
+<td class="sort-borough">Manhattan</td>
+<td class="sort-party">Democrat</td>
+<td class="sort-neighborhoods">Neighborhood A, Neighborhood B, Neighborhood C</td>
+<td class="sort-email"><span data-email="district{n}@council.nyc.gov"></span></td>
+</tr>'''
+
+
+# Helper method to build a listing page with the given number of rows.
+def council_page(rows):
+    body = ''.join(council_row.format(n=n) for n in range(1, rows + 1))
+    return '<html><body><table><tbody class="list">' + body + '</tbody></table></body></html>'
+
+
+# The extraction loop used by the Council script before the specs were added, without fetching the district pages.
+# Kept here as the baseline the specs are measured against.
+def find_rows(html_text):
+    soup = BeautifulSoup(html_text, 'lxml')
+    extracted_data = []
+    for district in soup.find('tbody', class_='list').find_all('tr'):
+        if district.find('td', class_='sort-district'):
+            district_num = district.find('td', class_='sort-district').text.strip()
+        else:
+            district_num = 'No info found.'
+        if district.find('td', class_='sort-member'):
+            cm_name = district.find('td', class_='sort-member').text.strip()
+            if district.find('td', class_='sort-member').find('a')['href']:
+                district_url = district.find('td', class_='sort-member').find('a')['href'].strip()
+            else:
+                district_url = 'No info found.'
+        else:
+            cm_name = 'No info found.'
+            district_url = 'No info found.'
+        if district.find('td', class_='sort-borough'):
+            cm_borough = district.find('td', class_='sort-borough').text.strip()
+        else:
+            cm_borough = 'No info found'
+        if district.find('td', class_='sort-party'):
+            cm_party = district.find('td', class_='sort-party').text.strip()
+        else:
+            cm_party = 'No info found.'
+        if district.find('td', class_='sort-neighborhoods'):
+            cm_neighborhoods = district.find('td', class_='sort-neighborhoods').text.strip()
+        else:
+            cm_neighborhoods = 'No info found.'
+        cm_email = ''
+        if district.find('td', class_='sort-email'):
+            if district.find('td', class_='sort-email').find('span')['data-email']:
+                cm_email = district.find('td', class_='sort-email').find('span')['data-email'].strip()
+            else:
+                cm_email = 'No info found.'
+        extracted_data.append([district_num, district_url, cm_name, cm_borough, cm_party, cm_neighborhoods, cm_email])
+    return extracted_data
+
+
+# The same extraction done with the Council script's spec.
+def spec_rows(html_text):
+    return sources.load('council').district_spec.extract_all(specs.parse_html(html_text))
+
+
+# Helper method to time a method and return the fastest time per row, in microseconds.
+def per_row(method, html_text):
+    best = min(timeit.repeat(lambda: method(html_text), number=1, repeat=repeat))
+    return best / row_count * 1e6
+
+
+def main():
+    html_text = council_page(row_count)
+
+    # Both methods must extract the same rows for the comparison to be fair.
+    if find_rows(html_text) != spec_rows(html_text):
+        sys.exit('The spec and the find() loop extracted different rows!')
+
+    find_time = per_row(find_rows, html_text)
+    spec_time = per_row(spec_rows, html_text)
+    print(f'Council rows: {row_count}')
+    print(f'find() loop : {find_time:8.1f} us/row (parse + extract)')
+    print(f'spec        : {spec_time:8.1f} us/row (parse + extract)')
+    print(f'Speedup     : {find_time / spec_time:8.1f}x')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Shared helpers used by the web-scraping scripts found in the Scripts folder.
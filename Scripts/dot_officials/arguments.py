@@ -0,0 +1,39 @@
+import argparse
+
+from dot_officials import export
+from dot_officials import parsers
+from dot_officials import store
+
+
+# Option action that picks the parser of the HTML pages as soon as the option is read.
+class ParserAction(argparse.Action):
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parsers.use(values)
+        setattr(namespace, self.dest, values)
+
+
+# Helper method to build the command line options shared by every script.
+def build_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--diff', action='store_true',
+                        help='Also export the records that were added, removed, or modified since the last export.')
+    parser.add_argument('--format', action='append', choices=list(export.writers), dest='formats',
+                        help='Format to export the records to, on top of the .csv file. Can be given more than once. '
+                             'Defaults to ' + ', '.join(export.default_formats) + '.')
+    parser.add_argument('--store', nargs='?', const=store.default_database, metavar='DATABASE',
+                        help='Also save the records to a SQLite database, updating the records saved by earlier runs. '
+                             'Defaults to "' + store.default_database + '".')
+    parser.add_argument('--parser', action=ParserAction, choices=list(parsers.parser_types),
+                        help='Parser the HTML pages are parsed with. Defaults to the DOT_OFFICIALS_PARSER environment '
+                             'variable, or to ' + parsers.default_parser + '. Use bs4 when a site\'s markup breaks '
+                             'the others.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Run under cProfile, print the slowest functions, and save the profile next to the '
+                             'exported files.')
+    return parser
+
+
+# Read the command line options of a script.
+def parse_args(description, args=None):
+    return build_parser(description).parse_args(args)
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+default_cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'dot-officials', 'http')
+fresh_for = 600  # Seconds a cached page is reused without asking the site whether it changed.
+max_age = 30 * 24 * 60 * 60  # Seconds before a cached page is thrown away, even if it's still being used.
+max_bytes = 200 * 1024 * 1024  # Largest size of the cache. The least recently used pages are removed first.
+kept_headers = ['Content-Type', 'ETag', 'Last-Modified']  # Response headers saved along with the page.
+
+
+# On-disk cache of fetched pages.
+# Each page is saved as two files named after a hash of its URL: a .body file with the contents of the page and a
+# .json file with the validators (ETag / Last-Modified) and the times the page was saved and last used.
+class ResponseCache:
+
+    def __init__(self, directory=None, fresh_for=fresh_for, max_age=max_age, max_bytes=max_bytes):
+        self.directory = directory or os.environ.get('DOT_OFFICIALS_CACHE_DIR') or default_cache_dir
+        self.fresh_for = fresh_for
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total = None  # Size of the cache in bytes. Computed the first time a page is saved.
+        os.makedirs(self.directory, exist_ok=True)
+
+    # Helper method to get the path of the .body and .json files of a URL.
+    def paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.body', base + '.json'
+
+    # Look up the cached entry of a URL. Returns None if the URL isn't cached or if the entry is too old to be used.
+    def lookup(self, url):
+        body_path, meta_path = self.paths(url)
+        try:
+            with open(meta_path, encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['stored_at'] > self.max_age or not os.path.exists(body_path):
+            self.remove(url)
+            return None
+        return entry
+
+    # Check if an entry was saved recently enough to be used without asking the site whether the page changed.
+    def is_fresh(self, entry):
+        return time.time() - entry['validated_at'] < self.fresh_for
+
+    # Build the conditional request headers for an entry, so the site can answer with a 304 if the page didn't change.
+    @staticmethod
+    def validators(entry):
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    # Save a fetched page to the cache.
+    def store(self, url, response):
+        now = time.time()
+        entry = {
+            'url': url,
+            'headers': {name: response.headers[name] for name in kept_headers if name in response.headers},
+            'encoding': response.encoding,
+            'size': len(response.content),
+            'stored_at': now,
+            'validated_at': now,
+            'used_at': now,
+        }
+        previous = self.lookup(url)
+        body_path, meta_path = self.paths(url)
+        self.write(body_path, response.content)
+        self.write(meta_path, json.dumps(entry).encode('utf-8'))
+        with self.lock:
+            if self.total is None:
+                self.total = sum(x['size'] for x in self.entries())
+            else:
+                self.total += entry['size'] - (previous['size'] if previous else 0)
+            if self.total > self.max_bytes:
+                self.evict()
+        return entry
+
+    # Mark an entry as used. If the site answered with a 304, the entry was also just validated.
+    def touch(self, entry, validated=False):
+        entry['used_at'] = time.time()
+        if validated:
+            entry['validated_at'] = entry['used_at']
+        self.write(self.paths(entry['url'])[1], json.dumps(entry).encode('utf-8'))
+
+    # Build a response out of a cached entry, so callers can't tell it apart from a fetched page.
+    def response(self, entry):
+        from requests.models import Response
+        from requests.structures import CaseInsensitiveDict
+
+        with open(self.paths(entry['url'])[0], 'rb') as file:
+            content = file.read()
+        response = Response()
+        response._content = content
+        response._content_consumed = True  # Lets iter_content() read the cached body instead of the network.
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry['url']
+        response.encoding = entry['encoding']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.from_cache = True
+        return response
+
+    # Remove the cached entry of a URL.
+    def remove(self, url):
+        for path in self.paths(url):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # Helper method to read the metadata of every entry in the cache.
+    def entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as file:
+                    entries.append(json.load(file))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    # Remove the least recently used entries until the cache fits within the size limit.
+    # Must be called while holding the lock.
+    def evict(self):
+        entries = self.entries()
+        self.total = sum(entry['size'] for entry in entries)
+        for entry in sorted(entries, key=lambda x: x['used_at']):
+            if self.total <= self.max_bytes:
+                break
+            self.remove(entry['url'])
+            self.total -= entry['size']
+
+    # Helper method to write a file in one step, so a crash never leaves a half-written file in the cache.
+    @staticmethod
+    def write(path, data):
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, path)
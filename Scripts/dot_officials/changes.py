@@ -0,0 +1,85 @@
+import csv
+import datetime as dt
+import glob
+import os
+
+from dot_officials import export
+
+# Pattern of the date and time found in the names of the exported files.
+timestamp_pattern = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9][0-9][0-9]'
+
+
+# Find the most recent .csv file exported for a source, other than the given file. Returns None if there is none.
+def previous_snapshot(file_name, exclude=None, directory='.'):
+    pattern = glob.escape(file_name) + ' ' + timestamp_pattern + '.csv'
+    snapshots = glob.glob(os.path.join(glob.escape(directory), pattern))
+    if exclude is not None:
+        snapshots = [path for path in snapshots if not os.path.samefile(path, exclude)]
+    # The date and time in the names are saved in YYYY-MM-DD HHMM format, so the latest file sorts last.
+    return max(snapshots, default=None)
+
+
+# Helper method to index rows by their natural key. If several rows share a key, the repeats are numbered, so that
+# no row is lost.
+def index_rows(headers, key_columns, rows):
+    key_indexes = [headers.index(column) for column in key_columns]
+    indexed = {}
+    for row in rows:
+        key = tuple(str(row[n]) for n in key_indexes)
+        repeat = 1
+        while key + ((repeat,) if repeat > 1 else ()) in indexed:
+            repeat += 1
+        indexed[key + ((repeat,) if repeat > 1 else ())] = [str(value) for value in row]
+    return indexed
+
+
+# Compare two sets of rows, matching them on their natural key.
+# Returns a list of (change, row, changed fields) tuples, where change is 'Added', 'Removed', or 'Modified' and the
+# changed fields are (header, old value, new value) tuples. Rows that didn't change are left out.
+def diff_rows(headers, key_columns, old_rows, new_rows):
+    old = index_rows(headers, key_columns, old_rows)
+    new = index_rows(headers, key_columns, new_rows)
+
+    changes = []
+    for key, row in new.items():
+        if key not in old:
+            changes.append(('Added', row, []))
+            continue
+        changed_fields = [(header, old_value, new_value)
+                          for header, old_value, new_value in zip(headers, old[key], row) if old_value != new_value]
+        if changed_fields:
+            changes.append(('Modified', row, changed_fields))
+    for key, row in old.items():
+        if key not in new:
+            changes.append(('Removed', row, []))
+    return changes
+
+
+# Helper method to describe the changed fields of a modified record, one field per line.
+def describe_fields(changed_fields):
+    return '\n'.join(f'{header}: {old_value!r} -> {new_value!r}' for header, old_value, new_value in changed_fields)
+
+
+# Compare a freshly exported .csv file against the previous export of the same source, and export the records that
+# were added, removed, or modified to a "<file_name> Changes YYYY-MM-DD HHMM.csv" file.
+# Returns the name of the file, or None if there was no previous export to compare against.
+def export_changes(file_name, headers, key_columns, csv_path):
+    previous = previous_snapshot(file_name, exclude=csv_path, directory=os.path.dirname(csv_path) or '.')
+    if previous is None:
+        print('No previous export of', file_name, 'found. Every record is new.')
+        return None
+
+    changes = diff_rows(headers, key_columns, export.read_csv(previous), export.read_csv(csv_path))
+
+    # Datetime objects to grab both the data and time the script was executed.
+    datetime_obj = dt.datetime.now().strftime("%Y-%m-%d %H%M")  # Date is saved in YYYY/MM/DD HHMM format.
+    changes_path = os.path.join(os.path.dirname(csv_path), file_name + ' Changes ' + datetime_obj + '.csv')
+    with open(changes_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Change'] + headers + ['Changed Fields'])
+        for change, row, changed_fields in changes:
+            writer.writerow([change] + row + [describe_fields(changed_fields)])
+
+    print(f'{len(changes)} record(s) changed since', previous)
+    print("Changes outputted to (as a .csv) :", changes_path)
+    return changes_path
@@ -0,0 +1,50 @@
+import importlib
+import sys
+
+from dot_officials import sources
+
+# The subcommands that aren't a source, with the module whose main() they run and what they do. Each source's
+# subcommand runs the main() of its script, named as in sources.scripts.
+# Nothing but the module of the subcommand that runs is imported, so a lookup never imports openpyxl, the Community
+# Boards never import lxml, and --help imports nothing at all.
+tools = {
+    'all': ('dot_officials.orchestrator', 'Scrape every source at the same time and export them together.'),
+    'refresh': ('dot_officials.refresh', 'Refresh each source on its own schedule, exporting it only when it changed.'),
+    'lookup': ('dot_officials.lookup', 'Serve lookups of the exported officials, as JSON.'),
+    'join': ('dot_officials.join', 'Join a .csv file of assets against the exported officials.'),
+    'assign': ('dot_officials.spatial', 'Assign the assets of a .csv file to their districts and officials.'),
+}
+program = 'dot-officials'  # Name of the installed command.
+
+
+# Helper method to build the list of subcommands printed by --help.
+def usage():
+    lines = [f'usage: {program} <command> [options]', '', 'Scrape the contact information of NYC\'s public officials.',
+             '', 'sources:']
+    lines += [f'  {name}' for name in sources.scripts]
+    lines += ['', 'other commands:']
+    lines += [f'  {name:<18}{description}' for name, (module, description) in tools.items()]
+    lines += ['', f'Run "{program} <command> --help" for the options of a command.']
+    return '\n'.join(lines)
+
+
+# Run the subcommand given on the command line, with the rest of the command line as its options.
+def main(args=None):
+    args = sys.argv[1:] if args is None else list(args)
+    if not args or args[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if args else 2
+
+    command = args[0]
+    if command in sources.scripts:
+        method = sources.load(command).main
+    elif command in tools:
+        method = importlib.import_module(tools[command][0]).main
+    else:
+        print(usage(), file=sys.stderr)
+        print(f'\n{program}: error: unknown command: {command}', file=sys.stderr)
+        return 2
+
+    # The subcommands read their options from sys.argv, and name themselves after it in their --help.
+    sys.argv = [f'{program} {command}'] + args[1:]
+    return method()
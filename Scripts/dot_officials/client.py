@@ -0,0 +1,197 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from dot_officials import limiter
+from dot_officials import metrics
+from dot_officials.cache import ResponseCache
+
+user_agent = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/103.0.0.0 Safari/537.36')
+connect_timeout = 5  # Seconds to wait for the TCP + TLS handshake.
+read_timeout = 30  # Seconds to wait for the server to send the response.
+max_retries = 4  # Number of times a request is retried after the first attempt.
+backoff_base = 0.5  # Seconds to wait before the first retry. Doubles with every retry.
+backoff_cap = 30  # Longest wait between two retries, in seconds.
+pool_size = 16  # Number of keep-alive connections kept open per host.
+retry_statuses = {429, 500, 502, 503, 504}  # Status codes that are worth retrying.
+use_cache = os.environ.get('DOT_OFFICIALS_CACHE', '1') != '0'  # Set DOT_OFFICIALS_CACHE=0 to turn off the cache.
+
+# requests is only imported the first time a page is fetched, so commands that never fetch a page (such as the lookup
+# service, or --help) start faster.
+
+# Sessions keep their connections open between requests. One session is kept for each host so that repeated requests
+# to the same site reuse the same connections.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# The on-disk cache of fetched pages. Created the first time a page is fetched.
+_cache = None
+_cache_lock = threading.Lock()
+
+# Fixtures the fetched pages are recorded to, or replayed from instead of fetching them. See record() and replay().
+_fixtures = None
+_replaying = False
+
+
+# Raised when a page could not be fetched, even after retrying.
+class FetchError(Exception):
+    pass
+
+
+# Helper method to build the Accept-Encoding header. Brotli is only advertised when a brotli decoder is installed.
+def accept_encoding():
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return 'gzip, deflate'
+    return 'gzip, deflate, br'
+
+
+# Helper method to get the pooled session for the host of the URL, creating it the first time the host is seen.
+def session_for(url):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    host = urlsplit(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': user_agent, 'Accept-Encoding': accept_encoding()})
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[host] = session
+    return session
+
+
+# Helper method to compute how long to wait before the next retry.
+# Uses exponential backoff with full jitter, unless the server told us how long to wait with a Retry-After header.
+def backoff_delay(attempt, response=None):
+    if response is not None and response.headers.get('Retry-After', '').isdigit():
+        return min(backoff_cap, int(response.headers['Retry-After']))
+    return random.uniform(0, min(backoff_cap, backoff_base * 2 ** attempt))
+
+
+# Helper method to get the on-disk cache, or None if the cache is turned off.
+def response_cache():
+    global _cache
+    if not use_cache:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+    return _cache
+
+
+# Save every page fetched from now on to a folder of fixtures, so the scrapers can later be run offline.
+def record(directory):
+    global _fixtures, _replaying
+    _fixtures = ResponseCache(directory, fresh_for=float('inf'), max_age=float('inf'), max_bytes=float('inf'))
+    _replaying = False
+
+
+# Serve every page from a folder of fixtures saved by record(), instead of fetching it.
+def replay(directory):
+    global _fixtures, _replaying
+    _fixtures = ResponseCache(directory, fresh_for=float('inf'), max_age=float('inf'), max_bytes=float('inf'))
+    _replaying = True
+
+
+# Helper method to get the full URL of a request, including its query parameters.
+# Raises FetchError if the URL is malformed, such as a URL without a scheme. It's raised right away, since every retry
+# would fail the same way.
+def full_url(url, params=None):
+    from requests.exceptions import RequestException
+    from requests.models import PreparedRequest
+
+    request = PreparedRequest()
+    try:
+        request.prepare_url(url, params)
+    except RequestException as error:
+        raise FetchError(f'Unable to fetch {url}: {error}') from error
+    return request.url
+
+
+# Fetch a URL through the pooled session of its host.
+# Pages saved in the on-disk cache are reused: recently saved pages are returned without a request, and older ones
+# are fetched with a conditional request so that the site can answer with a 304 instead of sending the page again.
+# Requests are paced by the adaptive limiter of their host, see limiter.py.
+# Connection errors, timeouts, 429 and 5xx responses are retried. Any other response is returned as is.
+# Raises FetchError if the page still can't be fetched after the last retry.
+def get(url, headers=None, cache=True, **kwargs):
+    cache_url = full_url(url, kwargs.get('params'))
+    if _replaying:
+        entry = _fixtures.lookup(cache_url)
+        if entry is None:
+            raise FetchError(f'No recorded fixture for {cache_url}')
+        return _fixtures.response(entry)
+
+    # Streamed responses are read by the caller piece by piece, so they can't be saved to the cache.
+    cache = response_cache() if cache and not kwargs.get('stream') else None
+    entry = None
+    if cache is not None:
+        entry = cache.lookup(cache_url)
+        if entry is not None:
+            if cache.is_fresh(entry):
+                cache.touch(entry)
+                metrics.record_cache_hit(cache_url)
+                return recorded(cache_url, cache.response(entry))
+            headers = {**cache.validators(entry), **(headers or {})}
+
+    response = send(url, headers, **kwargs)
+
+    if cache is not None:
+        if entry is not None and response.status_code == 304:
+            cache.touch(entry, validated=True)
+            metrics.record_cache_hit(cache_url, revalidated=True)
+            return recorded(cache_url, cache.response(entry))
+        if response.status_code == 200:
+            cache.store(cache_url, response)
+    return response if kwargs.get('stream') else recorded(cache_url, response)
+
+
+# Helper method to save a page to the fixtures while recording.
+def recorded(cache_url, response):
+    if _fixtures is not None and response.status_code == 200:
+        _fixtures.store(cache_url, response)
+    return response
+
+
+# Helper method to send a request, retrying it if it fails.
+def send(url, headers=None, **kwargs):
+    import requests
+
+    session = session_for(url)
+    kwargs.setdefault('timeout', (connect_timeout, read_timeout))
+    for attempt in range(max_retries + 1):
+        response = None
+        start = time.perf_counter()
+        try:
+            # The limiter of the host decides when the request can be sent, and adapts to how the site responds.
+            response = limiter.for_url(url).run(lambda: session.get(url, headers=headers, **kwargs))
+        except (requests.exceptions.InvalidURL, requests.exceptions.InvalidSchema,
+                requests.exceptions.MissingSchema) as error:
+            # A malformed URL fails the same way on every retry, so it isn't retried.
+            metrics.record_error(url)
+            raise FetchError(f'Unable to fetch {url}: {error}') from error
+        except requests.RequestException as error:
+            if attempt == max_retries:
+                metrics.record_error(url)
+                raise FetchError(f'Unable to fetch {url}: {error}') from error
+        else:
+            metrics.record_request(url, response, time.perf_counter() - start, streamed=kwargs.get('stream', False))
+            if response.status_code not in retry_statuses:
+                return response
+            if attempt == max_retries:
+                metrics.record_error(url)
+                raise FetchError(f'Unable to fetch {url}: HTTP {response.status_code}')
+            response.close()
+        metrics.record_retry(url)
+        time.sleep(backoff_delay(attempt, response))
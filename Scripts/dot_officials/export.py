@@ -0,0 +1,233 @@
+from contextlib import contextmanager
+import csv
+import datetime as dt
+import json
+import os
+import pickle
+import tempfile
+
+from dot_officials import changes
+from dot_officials import journal
+from dot_officials import metrics
+from dot_officials import store
+
+parquet_batch_rows = 50000  # Number of rows written to each row group of a .parquet file.
+# Columns saved as integers in the typed formats (Parquet and JSON Lines), instead of text such as "District 12".
+integer_columns = ['District No.', 'Community Board Number']
+
+
+# openpyxl is only imported when an .xlsx file is written, so runs exporting other formats never load it.
+
+# Running maximum of the length of the values in each column, used to size the columns of the .xlsx file.
+# The widths are tracked while the rows are written, so the rows never have to be read a second time to size them.
+class ColumnWidths:
+
+    def __init__(self, headers):
+        self.widths = [len(str(header)) for header in headers]
+
+    # Update the widths with the values of a row.
+    def update(self, row):
+        for n, value in enumerate(row):
+            length = len(str(value))
+            if n >= len(self.widths):
+                self.widths.append(length)
+            elif length > self.widths[n]:
+                self.widths[n] = length
+
+    # Set the widths of the columns of a worksheet. Must be called before any row is added to a write-only worksheet.
+    def apply(self, ws):
+        from openpyxl.utils import get_column_letter
+
+        for n, width in enumerate(self.widths, start=1):
+            ws.column_dimensions[get_column_letter(n)].width = width
+
+
+# Helper method to write a file atomically: the file is written to a temporary '.part' file next to it, which only
+# replaces the file once it's complete. A run that fails halfway leaves no partial file behind.
+@contextmanager
+def atomic(path):
+    temp_path = path + '.part'
+    try:
+        yield temp_path
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+
+
+# Helper method to export rows of extracted data to a .csv file. Returns the widths of the columns.
+# The rows are counted in the metrics of the run.
+def write_csv(path, headers, rows):
+    widths = ColumnWidths(headers)
+    count = 0
+    with atomic(path) as temp_path, open(temp_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        for row in rows:
+            row = list(row)  # A record builds its row each time it's iterated over, so it's only built once here.
+            writer.writerow(row)  # Append the data we extracted from earlier to .csv file.
+            widths.update(row)
+            count += 1
+    metrics.count_rows(count)
+    return widths
+
+
+# Helper method to read the rows of a .csv file written by write_csv(), one row at a time, without the headers.
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        yield from reader
+
+
+# Helper method to save rows to a temporary file while tracking the widths of the columns.
+# Returns the widths and a generator that reads the rows back one at a time.
+def spool(headers, rows):
+    widths = ColumnWidths(headers)
+    file = tempfile.TemporaryFile()
+    for row in rows:
+        row = list(row)
+        pickle.dump(row, file)
+        widths.update(row)
+
+    def read_back():
+        with file:
+            file.seek(0)
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
+
+    return widths, read_back()
+
+
+# Helper method to export several tables of extracted data to one .xlsx file, one worksheet per table.
+# Each sheet is given as a (sheet title, headers, rows) tuple, or as a (sheet title, headers, rows, widths) tuple when
+# the widths of the columns are already known. The workbook is written in write-only mode, so rows are streamed to the
+# file instead of being kept in memory.
+def write_workbook(path, sheets):
+    import openpyxl as xl
+
+    wb = xl.Workbook(write_only=True)  # Create an Excel workbook.
+
+    for sheet in sheets:
+        title, headers, rows = sheet[:3]
+        widths = sheet[3] if len(sheet) > 3 else None
+        # The widths must be set before the first row is written, so spool the rows first if they're unknown.
+        if widths is None:
+            widths, rows = spool(headers, rows)
+
+        ws = wb.create_sheet(title=title)
+        widths.apply(ws)  # Adjust column size by max length of cell length for readable convenience.
+        ws.append(headers)  # Add the column names to the sheet.
+        for row in rows:
+            ws.append(row)
+
+    # Save the file.
+    with atomic(path) as temp_path:
+        wb.save(temp_path)
+
+
+# Helper method to get the typed value of each column of a row: the number in the integer columns (or None if there is
+# none), and the text of every other column.
+def typed_values(headers, row):
+    return [store.number(value) if header in integer_columns else value for header, value in zip(headers, row)]
+
+
+# Helper method to export rows of extracted data to a .jsonl file (JSON Lines): one JSON object per row, by column
+# name, with the integer columns as numbers.
+def write_jsonl(path, headers, rows):
+    names = [store.column_name(header) for header in headers]
+    with atomic(path) as temp_path, open(temp_path, 'w', encoding='utf-8') as file:
+        for row in rows:
+            file.write(json.dumps(dict(zip(names, typed_values(headers, row))), ensure_ascii=False) + '\n')
+
+
+# Helper method to export rows of extracted data to a .parquet file, with the integer columns typed as integers and
+# every other column as text. The rows are written a row group at a time, so they're never all held in memory.
+# Requires pyarrow.
+def write_parquet(path, headers, rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit('Writing Parquet files requires pyarrow: pip install pyarrow')
+
+    schema = pa.schema([(store.column_name(header), pa.int64() if header in integer_columns else pa.string())
+                        for header in headers])
+    with atomic(path) as temp_path, pq.ParquetWriter(temp_path, schema) as writer:
+        columns = [[] for _ in headers]
+        for row in rows:
+            for column, value in zip(columns, typed_values(headers, row)):
+                column.append(value)
+            if len(columns[0]) == parquet_batch_rows:
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+                columns = [[] for _ in headers]
+        if columns[0]:
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+
+# Helper method to export rows of extracted data to a .xlsx file with a single sheet.
+def write_xlsx(path, sheet_title, headers, rows, widths=None):
+    write_workbook(path, [(sheet_title, headers, rows) + ((widths,) if widths is not None else ())])
+
+
+# The formats the rows can be exported to on top of the .csv file, by file extension. Each one is a method taking the
+# path, sheet title, headers, rows and column widths, so more formats can be added without changing the scripts.
+writers = {
+    'xlsx': write_xlsx,
+    'jsonl': lambda path, sheet_title, headers, rows, widths=None: write_jsonl(path, headers, rows),
+    'parquet': lambda path, sheet_title, headers, rows, widths=None: write_parquet(path, headers, rows),
+}
+default_formats = ['xlsx']  # Formats exported when none are chosen.
+
+
+# Save the rows of a .csv file written by write_csv() in other formats, next to it and with the same name.
+# Returns the paths of the new files, by format.
+def convert_csv(csv_path, headers, formats, sheet_title=None, widths=None):
+    paths = {}
+    for output_format in formats:
+        paths[output_format] = csv_path[:-len('.csv')] + '.' + output_format
+        writers[output_format](paths[output_format], sheet_title, headers, read_csv(csv_path), widths)
+    return paths
+
+
+# Export rows of extracted data to a .csv file and to each of the given formats (a .xlsx file by default), named after
+# the date and time the script was executed. The rows are only read once: they're written to the .csv file, which is
+# then streamed into the other files. Returns the name of the .csv file and the names of the other files, by format.
+def export_data(file_name, sheet_title, headers, rows, xlsx_name=None, formats=None):
+    # Datetime objects to grab both the data and time the script was executed.
+    datetime_obj = dt.datetime.now().strftime("%Y-%m-%d %H%M")  # Date is saved in YYYY/MM/DD HHMM format.
+    csv_path = file_name + ' ' + datetime_obj + '.csv'
+
+    with metrics.stage('export'):
+        # Data filtered and extracted. Export the info into .csv file.
+        widths = write_csv(csv_path, headers, rows)
+
+        # Data filtered, extracted, and now needs to be exported to the other formats.
+        paths = convert_csv(csv_path, headers, [output_format for output_format in formats or default_formats
+                                                if output_format != 'xlsx'])
+        if 'xlsx' in (formats or default_formats):
+            paths['xlsx'] = (xlsx_name or file_name) + ' ' + datetime_obj + '.xlsx'
+            write_xlsx(paths['xlsx'], sheet_title, headers, read_csv(csv_path), widths)
+
+    # Let the user know that the data has been exported
+    print("Program complete!")
+    print("Data outputted to (as a .csv) :", csv_path)
+    for output_format, path in paths.items():
+        print(f"Data outputted to (as a .{output_format}) :", path)
+    return csv_path, paths
+
+
+# Finish the export of a source once its .csv file is written, the same way for every script and for All Sources.py:
+# export the records that changed since the previous export if diff is set, save the records to the database if one is
+# given (pruning the records that are gone if prune is set), and clear the progress journal of the source, since every
+# page made it into the export, so the next run starts over.
+def finish_export(file_name, headers, key_columns, records, csv_path, diff=False, database=None, prune=True):
+    if diff:
+        changes.export_changes(file_name, headers, key_columns, csv_path)
+    if database:
+        store.save(database, file_name, headers, key_columns, records, prune=prune)
+    journal.clear(file_name)
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from dot_officials import client
+from dot_officials import limiter
+
+
+# Helper method to fetch a single page. Returns None if the page couldn't be fetched, so one bad page doesn't stop
+# the rest of the pages from being fetched.
+def fetch_page(url):
+    try:
+        return client.get(url)
+    except client.FetchError:
+        return None
+
+
+# Helper method to fetch a list of pages in parallel using a bounded pool of worker threads.
+# By default there is a thread for each request the limiter of the site could ever allow in flight, and the limiter
+# decides how many of them actually send requests at once. If on_fetched is given, it's called with the URL and the
+# response (or None) of each page as soon as the page is fetched, from the worker thread.
+# The responses are returned in the same order as the URLs, so the extracted rows stay in a deterministic order.
+def fetch_all(urls, workers=None, on_fetched=None):
+    urls = list(urls)
+    if not urls:
+        return []
+    # Never start more threads than there are pages to fetch.
+    workers = min(workers or limiter.for_url(urls[0]).max_concurrency, len(urls))
+
+    def fetch(url):
+        response = fetch_page(url)
+        if on_fetched is not None:
+            on_fetched(url, response)
+        return response
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fetch, urls))
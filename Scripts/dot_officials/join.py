@@ -0,0 +1,277 @@
+import argparse
+from collections import deque
+import csv
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+from dot_officials import export
+from dot_officials import lookup
+from dot_officials import records
+from dot_officials import store
+
+chunk_size = 50000  # Number of assets read, joined, and written at a time.
+progress_every = 20  # Number of chunks between two progress lines.
+
+# The columns added to the assets for each source: the title they're prefixed with, and the columns of the official.
+joined_columns = {
+    'community-boards': ('Community Board', ['Community Board Chair', 'Community Board District Manager',
+                                             'Community Board Email']),
+    'council': ('Council', ['Name', 'Party', 'Email']),
+    'assembly': ('Assembly', ['Name', 'Email']),
+    'senate': ('State Senate', ['Name', 'Party', 'Email']),
+    'house': ('Congressional', ['Name', 'Party', 'Phone Number']),
+}
+# Boroughs by the first digit of a community district number (BoroCD), such as 2 in 203 for Bronx Community Board 3.
+borough_codes = {1: 'Manhattan', 2: 'Bronx', 3: 'Brooklyn', 4: 'Queens', 5: 'Staten Island'}
+other_borough = 'Other'  # Partition of the assets without a known borough.
+
+# What every chunk is joined against, set by start_worker(). Each worker process gets its own copy.
+_state = None
+
+
+# Helper method to read the rows of a .csv file in chunks. Returns the headers and a generator of chunks.
+def read_batches(file, size):
+    reader = csv.reader(file)
+    headers = next(reader)
+
+    def batches():
+        batch = []
+        for row in reader:
+            batch.append(row)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return headers, batches()
+
+
+# Helper method to read a .csv file in chunks of raw text, without parsing the rows, so the workers can parse them.
+# A chunk only ends where a row ends: a line break inside a quoted value doesn't end a row, and is found by counting
+# the quotes, since a row always holds an even number of them. Returns the headers and a generator of chunks.
+def read_text_chunks(file, size):
+    headers = next(csv.reader(file))
+
+    def chunks():
+        lines = []
+        rows = 0
+        quotes = 0
+        for line in file:
+            lines.append(line)
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                rows += 1
+                if rows == size:
+                    yield ''.join(lines)
+                    lines = []
+                    rows = 0
+        if lines:
+            yield ''.join(lines)
+
+    return headers, chunks()
+
+
+# Helper method to get the key of a district, matching the assets to the officials.
+# Community boards are numbered within their borough, so their key includes the borough. A community district number
+# (BoroCD, such as 203) holds the borough in its first digit, so the borough column isn't needed for those.
+def district_key(name, value, borough):
+    district = store.number(value)
+    if name != 'community-boards' or district is None:
+        return district
+    if district >= 100:
+        return borough_codes.get(district // 100, '').lower(), district % 100
+    return borough.strip().lower(), district
+
+
+# Helper method to build the hash table of the officials of a source, from its latest export. Built once per run.
+# Returns a dictionary of the joined columns, by district key.
+def officials_table(officials, name):
+    index = officials.indexes.get(name)
+    if index is None:
+        raise SystemExit(f'No export of {name} found in {officials.directory}. Run its script first.')
+    columns = joined_columns[name][1]
+    table = {}
+    for district, records in index.by_district.items():
+        for record in records:
+            key = district_key(name, str(district), record.get('Borough', ''))
+            table.setdefault(key, [record.get(column, '') for column in columns])
+    return table
+
+
+# Set what the chunks are joined against. Called once in each worker process, or once in this process if there are
+# no workers.
+def start_worker(state):
+    global _state
+    _state = state
+
+
+# Helper method to get the partition of an asset: the name of its borough, or Other. The borough is read from the
+# borough column, or else from the community district number (BoroCD) of the asset, if it's joined to its community
+# board, so an asset is written to the file of the same borough it was joined with.
+def partition(borough, board=''):
+    parsed = records.Borough.parse(borough)
+    if parsed is None and board:
+        key = district_key('community-boards', board, '')
+        parsed = records.Borough.parse(key[0]) if key is not None else None
+    return parsed.value if parsed is not None else other_borough
+
+
+# Join a chunk of assets against the officials. The chunk is parsed and the joined rows are formatted as .csv text in
+# here, so the workers do all the work but reading and writing the files.
+# The columns holding the districts and the borough are copied into a ColumnBatch, so each district key is looked up
+# once per distinct district in the chunk, instead of once per asset.
+# Returns the number of rows and the .csv text of the joined rows, by borough.
+def join_chunk(text):
+    joins, tables, borough_index = _state
+    rows = list(csv.reader(io.StringIO(text, newline='')))
+    batch = records.ColumnBatch.from_rows(rows, [column_index for _, column_index in joins] +
+                                          ([borough_index] if borough_index is not None else []))
+    if borough_index is None:
+        batch.columns.append([''] * len(batch))  # Without a borough column, no asset has a known borough.
+    borough_column = len(joins)  # The borough is the last column of the batch.
+
+    joined = []  # The joined columns of each source, one list per asset.
+    for column, (name, _) in enumerate(joins):
+        table = tables[name]
+        empty = ['' for _ in joined_columns[name][1]]
+        joined.append(batch.map(lambda value, borough: table.get(district_key(name, value, borough), empty), column,
+                                borough_column))
+
+    # The borough of each asset, from its borough column or its community board.
+    board_columns = [column for column, (name, _) in enumerate(joins) if name == 'community-boards'][:1]
+    boroughs = batch.map(partition, borough_column, *board_columns)
+
+    outputs = {}
+    writers = {}
+    for row, borough, *extra in zip(rows, boroughs, *joined):
+        writer = writers.get(borough)
+        if writer is None:
+            outputs[borough] = io.StringIO()
+            writer = writers[borough] = csv.writer(outputs[borough])
+        writer.writerow(row + [value for values in extra for value in values])
+    return len(rows), {borough: output.getvalue() for borough, output in outputs.items()}
+
+
+# Helper method to get the name of a joined column, such as "Council Name". The title isn't repeated if the column
+# already starts with it, as in "Community Board Chair".
+def joined_header(name, column):
+    title = joined_columns[name][0]
+    return column if column.startswith(title) else title + ' ' + column
+
+
+# Writes the joined assets to one .csv file per borough, opening each file the first time its borough is seen.
+class PartitionWriter:
+
+    def __init__(self, directory, headers):
+        self.directory = directory
+        self.headers = headers
+        self.files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    # Append .csv text to the file of a borough.
+    def write(self, borough, text):
+        file = self.files.get(borough)
+        if file is None:
+            file = self.files[borough] = open(os.path.join(self.directory, borough + '.csv'), 'w', newline='',
+                                              encoding='utf-8')
+            csv.writer(file).writerow(self.headers)
+        file.write(text)
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        return [os.path.join(self.directory, borough + '.csv') for borough in self.files]
+
+
+# Join the assets of a .csv file against the officials of the latest exports, and write them to one .csv file per
+# borough in the output folder. joins is a list of (source, column) tuples, naming the column of the assets holding
+# the district of each source. The assets are read, joined, and written a chunk at a time, so memory stays flat no
+# matter how many there are. With workers, the chunks are joined by that many processes, with only a few chunks in
+# flight at once. If formats are given, each borough's .csv file is also saved in those formats, such as parquet.
+# Returns the number of assets joined.
+def join_file(input_path, output_dir, joins, exports_dir='.', borough_column='Borough', size=chunk_size, workers=0,
+              formats=()):
+    officials = lookup.Directory(exports_dir)
+    tables = {name: officials_table(officials, name) for name, column in joins}
+
+    count = 0
+    start = time.perf_counter()
+    with open(input_path, newline='', encoding='utf-8') as input_file:
+        headers, chunks = read_text_chunks(input_file, size)
+        for name, column in joins:
+            if column not in headers:
+                raise SystemExit(f'No {column} column found in {input_path}.')
+        state = ([(name, headers.index(column)) for name, column in joins], tables,
+                 headers.index(borough_column) if borough_column in headers else None)
+        output = PartitionWriter(output_dir, headers + [joined_header(name, column) for name, _ in joins
+                                                        for column in joined_columns[name][1]])
+
+        written = 0  # Number of chunks written so far.
+
+        # Helper method to write a joined chunk to the files of its boroughs.
+        def write(joined):
+            nonlocal count, written
+            rows, outputs = joined
+            for borough, text in outputs.items():
+                output.write(borough, text)
+            count += rows
+            written += 1
+            if written % progress_every == 0:
+                print(f'{count:,} assets joined ({count / (time.perf_counter() - start):,.0f} rows/s)', file=sys.stderr)
+
+        if workers:
+            with multiprocessing.Pool(workers, initializer=start_worker, initargs=(state,)) as pool:
+                # Pool.imap() would read the whole file ahead of the workers, so the chunks are submitted a few at a
+                # time instead, and written in the order they were read.
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.apply_async(join_chunk, (chunk,)))
+                    if len(pending) >= workers * 2:
+                        write(pending.popleft().get())
+                while pending:
+                    write(pending.popleft().get())
+        else:
+            start_worker(state)
+            for chunk in chunks:
+                write(join_chunk(chunk))
+        paths = output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f'{count:,} assets joined in {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f} rows/s).')
+    for path in paths:
+        print("Data outputted to (as a .csv) :", path)
+        for output_format, converted in export.convert_csv(path, output.headers, formats).items():
+            print(f"Data outputted to (as a .{output_format}) :", converted)
+    return count
+
+
+# Helper method to read a --on option, such as council=CouncilDistrict.
+def join_option(value):
+    name, _, column = value.partition('=')
+    if name not in joined_columns or not column:
+        raise argparse.ArgumentTypeError(f'expected SOURCE=COLUMN with SOURCE one of: {", ".join(joined_columns)}')
+    return name, column
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Join a .csv file of assets against the scraped officials.')
+    parser.add_argument('input', help='.csv file of assets.')
+    parser.add_argument('output', help='Folder to save the joined assets to, as one .csv file per borough.')
+    parser.add_argument('--on', action='append', type=join_option, required=True, metavar='SOURCE=COLUMN',
+                        help='Column of the assets holding the district of a source, such as council=CouncilDistrict. '
+                             'Can be given once for each source.')
+    parser.add_argument('--borough-column', default='Borough', help='Column of the assets holding their borough.')
+    parser.add_argument('--exports', default='.', help='Folder the scripts exported their .csv files to.')
+    parser.add_argument('--chunk-size', type=int, default=chunk_size, help='Number of assets joined at a time.')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Number of processes joining the chunks. By default, the chunks are joined in this '
+                             'process.')
+    parser.add_argument('--format', action='append', choices=['jsonl', 'parquet'], dest='formats', default=[],
+                        help='Also save the joined assets of each borough in this format. Can be given more than once.')
+    options = parser.parse_args()
+    join_file(options.input, options.output, options.on, options.exports, options.borough_column, options.chunk_size,
+              options.workers, options.formats)
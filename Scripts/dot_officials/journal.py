@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+import time
+
+from dot_officials.fetch import fetch_all
+
+max_age = 12 * 60 * 60  # Seconds an entry of the journal is trusted for. Older entries are fetched again.
+
+
+# Helper method to get the path of the journal of a script.
+def journal_path(name, directory='.'):
+    return os.path.join(directory, name + ' Progress.jsonl')
+
+
+# Append-only record of the detail pages a script already fetched, one JSON line per page, keyed by URL.
+# Every page is written down as soon as it's done, so if the run crashes or is stopped halfway, the next run only
+# fetches the pages that are missing. Pages that couldn't be fetched are written down as failed, and are tried again by
+# the next run. The journal is cleared once the data extracted out of the pages has been exported.
+class Journal:
+
+    def __init__(self, name, directory='.'):
+        self.path = journal_path(name, directory)
+        self.lock = threading.Lock()
+        self.entries = self.load()  # Latest entry of each URL.
+
+    # Helper method to read the entries of a previous run. A line cut short by a crash is skipped.
+    def load(self):
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if time.time() - entry.get('time', 0) <= max_age:
+                    entries[entry['url']] = entry
+        return entries
+
+    # Check if a page was already fetched.
+    def done(self, url):
+        entry = self.entries.get(url)
+        return entry is not None and not entry['failed']
+
+    # Write down that a page was fetched, with its HTML, or that it failed. Safe to call from several
+    # threads at once. The line is flushed right away, so it survives a crash of the program.
+    def record(self, url, value=None, failed=False):
+        entry = {'url': url, 'failed': failed, 'value': value, 'time': time.time()}
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            self.entries[url] = entry
+
+
+# Fetch the detail pages that aren't done yet in the journal, in parallel. Every page is written to the journal as soon
+# as it's fetched or has failed, so each one ends up either done or explicitly failed before the data is exported.
+# The pages are only fetched here: they're extracted by the script's parse(), on the thread that runs it, so the time
+# spent parsing them is counted as parsing, under the script's own source.
+# Returns a dictionary with the HTML of each page, by URL. Pages that couldn't be fetched are left out.
+def fetch_details(journal, urls):
+    pending = [url for url in dict.fromkeys(urls) if not journal.done(url)]
+    if len(pending) < len(urls):
+        print(f'Resuming from {journal.path}: {len(urls) - len(pending)} of {len(urls)} pages already done.')
+
+    # Helper method to write a page down as soon as it's fetched.
+    def fetched(url, response):
+        if response is None:
+            journal.record(url, failed=True)
+        else:
+            journal.record(url, response.text)
+
+    fetch_all(pending, on_fetched=fetched)
+    return {url: journal.entries[url]['value'] for url in urls if journal.done(url)}
+
+
+# Delete the journal of a script, if it has one, once the run it belongs to has been exported.
+def clear(name, directory='.'):
+    path = journal_path(name, directory)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,129 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Default limits of every host. A source can change the limits of its hosts with configure().
+default_limits = {
+    'start_rate': 2.0,  # Requests per second allowed at first.
+    'min_rate': 0.2,  # Slowest the requests are ever sent, in requests per second.
+    'max_rate': 10.0,  # Fastest the requests are ever sent, in requests per second.
+    'burst': 2,  # Number of requests that can be sent at once after a quiet period.
+    'start_concurrency': 2,  # Number of requests allowed in flight at first.
+    'min_concurrency': 1,  # Fewest requests ever allowed in flight.
+    'max_concurrency': 8,  # Most requests ever allowed in flight.
+    'slow_after': 5.0,  # Seconds after which a response counts as a sign the site is overloaded.
+}
+congestion_statuses = {429, 503}  # Status codes telling us to slow down.
+decrease = 0.5  # The rate and concurrency are multiplied by this when the site is overloaded.
+cooldown = 1.0  # Seconds between two decreases, so a burst of errors from the same moment only counts once.
+
+# One limiter is kept for each host, so the limits of one site don't slow down the others.
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+# Schedules the requests sent to a single host, with a token bucket for the rate and a cap on the requests in flight.
+# Both adapt to the site with AIMD (additive increase, multiplicative decrease): every healthy response raises them a
+# little, and every 429, 503, connection error or slow response halves them. Before the first of those, they grow
+# exponentially instead, like TCP's slow start. They settle near the best rate the site tolerates, so no fixed number
+# of workers has to be tuned by hand.
+class HostLimiter:
+
+    def __init__(self, **limits):
+        self.condition = threading.Condition()
+        self.configure(**{**default_limits, **limits})
+        self.rate = self.start_rate
+        self.concurrency = float(self.start_concurrency)
+        self.tokens = float(self.burst)
+        self.active = 0  # Number of requests in flight.
+        self.refilled = time.monotonic()
+        self.decreased = 0.0  # When the rate and concurrency were last decreased.
+        self.slow_start = True  # Until the site first pushes back, the rate and concurrency grow exponentially.
+
+    # Change the limits of the host. The current rate and concurrency are kept within the new limits.
+    def configure(self, **limits):
+        with self.condition:
+            for name, value in limits.items():
+                if name not in default_limits:
+                    raise TypeError(f'Unknown limit: {name}')
+                setattr(self, name, value)
+            if hasattr(self, 'rate'):
+                self.rate = min(self.max_rate, max(self.min_rate, self.rate))
+                self.concurrency = min(self.max_concurrency, max(self.min_concurrency, self.concurrency))
+            self.condition.notify_all()
+
+    # Helper method to add the tokens earned since the last refill. Must be called while holding the condition.
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+    # Wait until a request can be sent: a slot is free and a token is available.
+    def acquire(self):
+        with self.condition:
+            while True:
+                self.refill()
+                if self.active < int(self.concurrency) and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.active += 1
+                    return
+                # Wait for a request to finish, or for the next token.
+                self.condition.wait(None if self.active >= int(self.concurrency) else (1 - self.tokens) / self.rate)
+
+    # Report that a request finished, with its status code (None if it failed) and how long it took.
+    def release(self, status=None, seconds=0.0):
+        with self.condition:
+            self.active -= 1
+            if status is None or status in congestion_statuses or seconds > self.slow_after:
+                now = time.monotonic()
+                if now - self.decreased >= cooldown:
+                    self.rate = max(self.min_rate, self.rate * decrease)
+                    self.concurrency = max(self.min_concurrency, self.concurrency * decrease)
+                    self.decreased = now
+                    self.slow_start = False
+            elif status < 500:
+                if self.slow_start:
+                    # Double the rate about every second, and the concurrency every time as many requests as are
+                    # allowed in flight come back healthy, to quickly find the pace the site tolerates.
+                    self.rate = min(self.max_rate, self.rate + 1)
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                else:
+                    # Then raise the rate by about one request per second every second, and the concurrency by one
+                    # every time as many requests as are allowed in flight come back healthy.
+                    self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            self.condition.notify_all()
+
+    # Send a request once the limiter allows it. Returns the response of send(), which takes no arguments.
+    def run(self, send):
+        self.acquire()
+        start = time.monotonic()
+        response = None
+        try:
+            response = send()
+            return response
+        finally:
+            self.release(response.status_code if response is not None else None, time.monotonic() - start)
+
+
+# Get the limiter of the host of a URL, creating it the first time the host is seen.
+def for_url(url):
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = HostLimiter()
+    return limiter
+
+
+# Change the limits of the host of a URL, such as configure(url, max_rate=5, max_concurrency=4).
+def configure(url, **limits):
+    for_url(url).configure(**limits)
+
+
+# Current rate and concurrency of each host, as a dictionary, for the run reports.
+def snapshot():
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {host: {'rate': round(limiter.rate, 2), 'concurrency': round(limiter.concurrency, 2)}
+            for host, limiter in limiters.items()}
@@ -0,0 +1,179 @@
+import argparse
+import csv
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from dot_officials import changes
+from dot_officials import sources
+from dot_officials import store
+
+default_host = '127.0.0.1'  # Only answer requests from this computer.
+default_port = 8765  # Port the lookup service listens on.
+reload_interval = 5  # Seconds between two checks for a newer export of each source.
+settle_time = 2  # Seconds a new export must go unchanged before it's loaded, so a file still being written is skipped.
+precinct_source = 'community-boards'  # Source whose precincts are indexed.
+precinct_header = 'Precinct No.(s)'  # Column listing the precincts of each community board.
+
+
+# In-memory indexes of the latest export of a source: its records by district number, and by borough if the source
+# has a Borough column. Built once, then only read, so lookups never need a lock.
+class SourceIndex:
+
+    def __init__(self, name, path):
+        module = sources.load(name)
+        self.name = name
+        self.path = path
+        self.modified = os.path.getmtime(path)
+        with open(path, newline='', encoding='utf-8') as file:
+            self.records = list(csv.DictReader(file))
+
+        # The district is the last column of the natural key: the board number for the Community Boards.
+        district_header = module.key_columns[-1]
+        self.by_district = {}
+        self.by_borough = {}
+        for record in self.records:
+            self.by_district.setdefault(store.number(record.get(district_header, '')), []).append(record)
+            if 'Borough' in record:
+                self.by_borough.setdefault(record['Borough'].lower(), []).append(record)
+
+
+# The officials of every source, loaded from the latest .csv file each script exported to a folder.
+# Every lookup is a dictionary lookup. The indexes of a source are rebuilt when a newer export of it lands, and are
+# swapped in all at once, so lookups made during a reload see either the old or the new records, never a mix.
+class Directory:
+
+    def __init__(self, directory='.'):
+        self.directory = directory
+        self.indexes = {}  # SourceIndex of each source that has been exported.
+        self.precincts = {}  # Community boards by precinct number.
+        self.reload_lock = threading.Lock()
+        self.reload()
+
+    # Load the latest export of each source, if it changed since it was last loaded.
+    # Returns the names of the sources that were reloaded.
+    def reload(self):
+        with self.reload_lock:
+            indexes = dict(self.indexes)
+            reloaded = []
+            for name in sources.scripts:
+                path = changes.previous_snapshot(sources.load(name).file_name, directory=self.directory)
+                current = indexes.get(name)
+                if path is None or (current is not None and current.path == path and
+                                    current.modified == os.path.getmtime(path)):
+                    continue
+                if current is not None and time.time() - os.path.getmtime(path) < settle_time:
+                    continue
+                indexes[name] = SourceIndex(name, path)
+                reloaded.append(name)
+
+            if precinct_source in reloaded:
+                self.precincts = build_precincts(indexes[precinct_source].records)
+            self.indexes = indexes
+        return reloaded
+
+    # Reload the latest exports every few seconds in a background thread, until the program exits.
+    def watch(self, interval=reload_interval):
+        def check():
+            while not stop.wait(interval):
+                for name in self.reload():
+                    print(f'Reloaded {name} from', self.indexes[name].path)
+
+        stop = threading.Event()
+        threading.Thread(target=check, name='lookup-reload', daemon=True).start()
+        return stop
+
+    # Find the officials of a district of a source, such as council district 33.
+    # The Community Boards are numbered within each borough, so a borough can also be given to narrow them down.
+    def district(self, name, number, borough=None):
+        index = self.indexes.get(name)
+        if index is None:
+            return []
+        records = index.by_district.get(store.number(number), [])
+        if borough is not None:
+            records = [record for record in records if record.get('Borough', '').lower() == borough.lower()]
+        return records
+
+    # Find the officials of a source in a borough.
+    def borough(self, name, borough):
+        index = self.indexes.get(name)
+        return index.by_borough.get(borough.lower(), []) if index is not None else []
+
+    # Find the community boards that a police precinct belongs to.
+    def precinct(self, number):
+        return self.precincts.get(store.number(number), [])
+
+
+# Helper method to build the inverted index from precinct numbers to the community boards that list them.
+def build_precincts(records):
+    precincts = {}
+    for record in records:
+        for precinct in re.findall(r'\d+', record.get(precinct_header, '')):
+            precincts.setdefault(int(precinct), []).append(record)
+    return precincts
+
+
+# Answers the lookups made over HTTP, as JSON:
+# GET /<source>/district/<number>[?borough=<borough>], GET /<source>/borough/<borough>, GET /precinct/<number>,
+# and GET /sources for the exports that are loaded.
+class LookupHandler(BaseHTTPRequestHandler):
+    officials = None  # The Directory the lookups are made against.
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if parts == ['sources']:
+            self.send_json({name: {'path': index.path, 'records': len(index.records)}
+                            for name, index in self.officials.indexes.items()})
+        elif len(parts) == 2 and parts[0] == 'precinct':
+            self.send_json(self.officials.precinct(parts[1]))
+        elif len(parts) == 3 and parts[0] in sources.scripts and parts[1] == 'district':
+            self.send_json(self.officials.district(parts[0], parts[2], query.get('borough')))
+        elif len(parts) == 3 and parts[0] in sources.scripts and parts[1] == 'borough':
+            self.send_json(self.officials.borough(parts[0], parts[2]))
+        else:
+            self.send_json({'error': 'Unknown lookup: ' + url.path}, status=404)
+
+    # Helper method to send a value as JSON.
+    def send_json(self, value, status=200):
+        body = json.dumps(value).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Don't log every request, so lookups in bulk don't flood the console.
+    def log_message(self, format, *args):
+        pass
+
+
+# Serve lookups over HTTP, reloading the exports as new ones land, until the program is stopped.
+def serve(directory='.', host=default_host, port=default_port):
+    officials = Directory(directory)
+    officials.watch()
+    handler = type('Handler', (LookupHandler,), {'officials': officials})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f'Loaded {", ".join(officials.indexes) or "no sources"} from', os.path.abspath(directory))
+    print(f'Serving lookups on http://{host}:{port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve lookups of the officials exported by the scripts, as JSON.')
+    parser.add_argument('--directory', default='.', help='Folder the scripts exported their .csv files to.')
+    parser.add_argument('--host', default=default_host, help='Address to listen on.')
+    parser.add_argument('--port', type=int, default=default_port, help='Port to listen on.')
+    options = parser.parse_args()
+    serve(options.directory, options.host, options.port)
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from dot_officials import parsers
+from dot_officials.cache import ResponseCache
+
+default_memo_dir = os.path.join(os.path.expanduser('~'), '.cache', 'dot-officials', 'extracted')
+max_age = 30 * 24 * 60 * 60  # Seconds before memoized rows are thrown away, even if the page didn't change.
+use_memo = os.environ.get('DOT_OFFICIALS_MEMO', '1') != '0'  # Set DOT_OFFICIALS_MEMO=0 to always parse the pages.
+
+# Extractors whose stale entries were already removed by this program, so the folder is only scanned once for each.
+_evicted = set()
+_evicted_lock = threading.Lock()
+
+
+# Helper method to get the folder the memoized rows are saved to.
+def memo_dir():
+    return os.environ.get('DOT_OFFICIALS_MEMO_DIR') or default_memo_dir
+
+
+# Helper method to remove the entries of an extractor that were saved by another version of it, or that are too old.
+# Each entry is a file named '<extractor>.<version>.<hash of the page>.json', so nothing has to be read to find them.
+def evict(directory, name, version):
+    now = time.time()
+    for file_name in os.listdir(directory):
+        if not file_name.startswith(name + '.'):
+            continue
+        path = os.path.join(directory, file_name)
+        try:
+            if not file_name.startswith(f'{name}.{version}.') or now - os.path.getmtime(path) > max_age:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# Extract the rows of a page with method(), which is given the page, unless the same page was already extracted by
+# the same version of the extractor. The rows are saved on disk, keyed by a hash of the page, so a page that didn't
+# change since the last run costs a hash and a small file read instead of parsing the HTML.
+# name: Name of the extractor, such as 'senate-contact'. Must not contain dots.
+# version: Version of the extractor. Change it whenever the rows it extracts change, so older rows aren't reused.
+# The rows must be made of lists, strings and numbers, so they can be saved as JSON.
+# The selected parser is part of the version, so rows extracted with a parser are never reused by another one.
+def extract(name, version, page, method):
+    if not use_memo:
+        return method(page)
+
+    version = f'{version}-{parsers.selected}'
+
+    directory = memo_dir()
+    with _evicted_lock:
+        if name not in _evicted:
+            os.makedirs(directory, exist_ok=True)
+            evict(directory, name, version)
+            _evicted.add(name)
+
+    data = page.encode('utf-8') if isinstance(page, str) else page
+    path = os.path.join(directory, f'{name}.{version}.{hashlib.sha256(data).hexdigest()}.json')
+    try:
+        if time.time() - os.path.getmtime(path) <= max_age:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+    except (OSError, ValueError):
+        pass
+
+    rows = method(page)
+    ResponseCache.write(path, json.dumps(rows).encode('utf-8'))
+    return rows
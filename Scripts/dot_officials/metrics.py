@@ -0,0 +1,190 @@
+from contextlib import contextmanager
+import datetime as dt
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from dot_officials import limiter
+
+# Stages timed for each source, in the order they run. The time of a stage never includes the time of the stages
+# running inside of it: the time spent parsing HTML is counted under 'parse', not under 'extract'.
+stage_names = ['fetch', 'parse', 'extract', 'export']
+default_source = 'run'  # Name the stages and rows are recorded under when no source is given.
+profile_lines = 25  # Number of functions printed by --profile, sorted by cumulative time.
+
+# The metrics of the current run. Sources run in parallel threads, so every update is made under the lock.
+_lock = threading.Lock()
+_stages = {}  # Seconds spent in each stage, by source.
+_rows = {}  # Number of rows exported, by source.
+_hosts = {}  # Request metrics, by host.
+
+# The source and the stages running in the current thread.
+_local = threading.local()
+
+
+# Forget the metrics recorded so far.
+def reset():
+    with _lock:
+        _stages.clear()
+        _rows.clear()
+        _hosts.clear()
+
+
+# Helper method to get the name of the source running in the current thread.
+def current_source():
+    return getattr(_local, 'source', default_source)
+
+
+# Record everything that runs inside the block under the given source.
+@contextmanager
+def source(name):
+    previous = current_source()
+    _local.source = name
+    try:
+        yield
+    finally:
+        _local.source = previous
+
+
+# Time the block as the given stage of the current source.
+@contextmanager
+def stage(name):
+    stack = _local.__dict__.setdefault('stack', [])
+    frame = [0.0]  # Time spent in the stages running inside of this one.
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1][0] += elapsed
+        with _lock:
+            stages = _stages.setdefault(current_source(), {})
+            stages[name] = stages.get(name, 0.0) + elapsed - frame[0]
+
+
+# Count the rows exported for the current source.
+def count_rows(count):
+    with _lock:
+        name = current_source()
+        _rows[name] = _rows.get(name, 0) + count
+
+
+# Helper method to get the metrics of the host of a URL, creating them the first time the host is seen.
+# Must be called while holding the lock.
+def host_metrics(url):
+    host = urlsplit(url).netloc
+    if host not in _hosts:
+        _hosts[host] = {'requests': 0, 'bytes': 0, 'cache_hits': 0, 'revalidated': 0, 'retries': 0, 'errors': 0,
+                        'latencies': []}
+    return _hosts[host]
+
+
+# Record a request sent to a site, along with how long the site took to answer.
+# The body of a streamed response hasn't been read yet, so its size is taken from its Content-Length header.
+def record_request(url, response, seconds, streamed=False):
+    if streamed or not hasattr(response.raw, 'tell'):
+        size = int(response.headers.get('Content-Length', 0) or 0)
+    else:
+        size = response.raw.tell()  # Bytes read from the connection, before decompression.
+    with _lock:
+        host = host_metrics(url)
+        host['requests'] += 1
+        host['bytes'] += size
+        host['latencies'].append(seconds)
+
+
+# Record a page served from the cache. revalidated is set when the site was asked and answered with a 304.
+def record_cache_hit(url, revalidated=False):
+    with _lock:
+        host = host_metrics(url)
+        host['revalidated' if revalidated else 'cache_hits'] += 1
+
+
+# Record a failed attempt that is about to be retried.
+def record_retry(url):
+    with _lock:
+        host_metrics(url)['retries'] += 1
+
+
+# Record a request that failed for good.
+def record_error(url):
+    with _lock:
+        host_metrics(url)['errors'] += 1
+
+
+# Helper method to get a percentile of a sorted list of values, using the nearest-rank method.
+def percentile(values, percent):
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))]
+
+
+# Build the report of the current run: the time of each stage and the rows of each source, and the requests of each
+# host with the 50th, 90th and 99th percentiles of their latency, in milliseconds.
+def report():
+    with _lock:
+        names = list(dict.fromkeys(list(_stages) + list(_rows)))
+        sources = {name: {'stages': {stage_name: round(seconds, 4) for stage_name, seconds in sorted(
+                              _stages.get(name, {}).items(), key=lambda item: stage_order(item[0]))},
+                          'rows': _rows.get(name, 0)} for name in names}
+        hosts = {}
+        for host, metrics in sorted(_hosts.items()):
+            latencies = sorted(metrics['latencies'])
+            hosts[host] = {key: value for key, value in metrics.items() if key != 'latencies'}
+            hosts[host]['latency_ms'] = {f'p{percent}': None if percentile(latencies, percent) is None else
+                                         round(percentile(latencies, percent) * 1000, 1) for percent in (50, 90, 99)}
+    # The rate and concurrency each site settled at.
+    for host, limits in limiter.snapshot().items():
+        if host in hosts:
+            hosts[host]['limiter'] = limits
+    return {'sources': sources, 'hosts': hosts}
+
+
+# Helper sort method to list the stages in the order they run, followed by any other stage.
+def stage_order(name):
+    return stage_names.index(name) if name in stage_names else len(stage_names)
+
+
+# Run a method while recording its metrics, then save the report next to the exported files, as
+# '<name> Report <date and time>.json'. If profile is set, the method is also run under cProfile: the slowest
+# functions are printed and the full profile is saved as '<name> Profile <date and time>.prof'.
+# The report is saved even if the method fails. Returns what the method returns. The metrics recorded so far are
+# forgotten first, unless keep is set, so the caller can add what it recorded before the run to the report.
+def run(name, method, profile=False, keep=False):
+    if not keep:
+        reset()
+    # Datetime objects to grab both the data and time the script was executed.
+    datetime_obj = dt.datetime.now().strftime("%Y-%m-%d %H%M")  # Date is saved in YYYY/MM/DD HHMM format.
+    profiler = None
+    if profile:
+        import cProfile  # Only imported when profiling, so every other run starts faster.
+        profiler = cProfile.Profile()
+    status = 'failed'
+    start = time.perf_counter()
+    try:
+        with source(name):
+            if profiler is not None:
+                result = profiler.runcall(method)
+            else:
+                result = method()
+        status = 'complete'
+        return result
+    finally:
+        run_report = {'name': name, 'started': datetime_obj, 'command': sys.argv, 'status': status,
+                      'seconds': round(time.perf_counter() - start, 4), **report()}
+        report_path = name + ' Report ' + datetime_obj + '.json'
+        with open(report_path, 'w', encoding='utf-8') as file:
+            json.dump(run_report, file, indent=2)
+        print("Run report outputted to (as a .json) :", report_path)
+
+        if profiler is not None:
+            import pstats
+            profile_path = name + ' Profile ' + datetime_obj + '.prof'
+            profiler.dump_stats(profile_path)
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(profile_lines)
+            print("Profile outputted to (as a .prof) :", profile_path)
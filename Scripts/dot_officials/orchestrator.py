@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime as dt
+import sys
+
+from dot_officials import arguments
+from dot_officials import export
+from dot_officials import metrics
+from dot_officials import sources
+
+workbook_name = 'NYC Public Officials'  # Name of the combined .xlsx file, followed by the date and time.
+
+
+# Helper method to run the scrape() method of a source. Returns the rows of extracted data and the error, if any.
+# The scripts exit the program when their site can't be reached, so SystemExit is caught as well. That way one
+# failed source doesn't stop the others.
+def scrape_source(name):
+    try:
+        with metrics.source(name):
+            return sources.load(name).scrape(), None
+    except (Exception, SystemExit) as error:
+        return None, error
+
+
+# Scrape every source at the same time, then export all of them together.
+# Each source is saved to its own .csv file, and all of them are saved to one .xlsx file with one sheet per source.
+# If diff is set, the records that changed since the previous export of each source are also exported.
+# If database is set, the records of each source are also saved to that SQLite database.
+# If formats other than xlsx are given, each source is also exported to its own file in each of those formats.
+# Returns the names of the sources that failed.
+def run_all(names=None, diff=False, database=None, formats=None):
+    names = list(names or sources.scripts)
+    formats = formats or export.default_formats
+
+    # Run the scrapers in parallel, so a full refresh takes as long as the slowest source.
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        results = dict(zip(names, executor.map(scrape_source, names)))
+
+    # Datetime objects to grab both the data and time the script was executed.
+    datetime_obj = dt.datetime.now().strftime("%Y-%m-%d %H%M")  # Date is saved in YYYY/MM/DD HHMM format.
+
+    # Export the sources that were scraped, in the same order as the sources were given.
+    sheets = []
+    failed = []
+    for name in names:
+        rows, error = results[name]
+        if error is not None:
+            print(f'Unable to scrape {name}: {error}')
+            failed.append(name)
+            continue
+        # An error while exporting a source, or saving it, doesn't stop the export of the other sources either. The
+        # sheet of the source is still added to the workbook if its .csv file was written.
+        try:
+            module = sources.load(name)
+            csv_name = module.file_name + ' ' + datetime_obj + '.csv'
+            # The widths of the columns are tracked while the .csv file is written, and the .csv file is then streamed
+            # into the sheet, so the rows of the sources aren't all held in the workbook at once.
+            with metrics.source(name), metrics.stage('export'):
+                widths = export.write_csv(csv_name, module.headers, rows)
+                paths = export.convert_csv(csv_name, module.headers, [output_format for output_format in formats
+                                                                      if output_format != 'xlsx'])
+            sheets.append((module.sheet_title, module.headers, export.read_csv(csv_name), widths))
+            print("Data outputted to (as a .csv) :", csv_name)
+            for output_format, path in paths.items():
+                print(f"Data outputted to (as a .{output_format}) :", path)
+            export.finish_export(module.file_name, module.headers, module.key_columns, rows, csv_name, diff=diff,
+                                 database=database)
+        except (Exception, SystemExit) as error:
+            print(f'Unable to export {name}: {error}')
+            failed.append(name)
+
+    if sheets and 'xlsx' in formats:
+        workbook = workbook_name + ' ' + datetime_obj + '.xlsx'
+        with metrics.stage('export'):
+            export.write_workbook(workbook, sheets)
+        print("Data outputted to (as a .xlsx) :", workbook)
+
+    return failed
+
+
+# Run the sources given on the command line, or every source if none are given.
+def main():
+    parser = arguments.build_parser('Scrape every source at the same time and export them together.')
+    parser.add_argument('sources', nargs='*', help='Sources to scrape: ' + ', '.join(sources.scripts) +
+                        '. Defaults to every source.')
+    options = parser.parse_args()
+    for name in options.sources:
+        if name not in sources.scripts:
+            parser.error(f'unknown source: {name}')
+
+    failed = metrics.run(workbook_name, lambda: run_all(options.sources, diff=options.diff, database=options.store,
+                                                        formats=options.formats),
+                         profile=options.profile)
+    print("Program complete!" if not failed else "Program complete, with errors!")
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,243 @@
+import io
+import os
+import threading
+
+default_parser = 'lxml'  # Parser used unless DOT_OFFICIALS_PARSER or --parser names another one.
+# Name of the parser the pages are parsed with. Set DOT_OFFICIALS_PARSER=bs4 to fall back to BeautifulSoup when a
+# site's markup breaks the faster parsers.
+selected = os.environ.get('DOT_OFFICIALS_PARSER') or default_parser
+
+# Parsers already built, by name, and the parser of each type of element they build, so the parser of an element is
+# found with a single dictionary lookup.
+_parsers = {}
+_node_types = {}
+_lock = threading.Lock()
+
+
+# The parsers below all offer the same few methods, which is all the specs need to extract the rows of a page:
+# parse(): Parse an HTML page (text or bytes). Returns the root element of the page.
+# compile(): Compile a CSS selector. Returns a method that finds the elements matching it inside an element.
+# text(): Text of an element and everything inside of it, leaving out the comments and the excluded elements.
+# attr(): Value of an attribute of an element, or an empty string.
+# tostring(): HTML of an element, as bytes.
+# parse_elements(): Parse an HTML page, keeping only the elements with a tag and class name for which keep() is true.
+# Each one imports its library when it's first used, so only the library of the parser in use has to be installed.
+
+
+# Parser built on lxml.html: the fastest of the three, and the default.
+class LxmlParser:
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        from lxml import html as lxml_html
+        from lxml.cssselect import CSSSelector
+
+        self.etree = etree
+        self.lxml_html = lxml_html
+        self.compile = CSSSelector
+        self.string_value = etree.XPath('string()')  # Text of an element, without the comments.
+        self.node_types = (etree._Element,)
+
+    def parse(self, html_text):
+        try:
+            return self.lxml_html.document_fromstring(html_text)
+        except ValueError:
+            # Pages starting with an XML declaration can only be parsed as bytes.
+            return self.lxml_html.document_fromstring(html_text.encode('utf-8'))
+
+    def text(self, node, excluded=()):
+        if not excluded:
+            return self.string_value(node)
+
+        excluded = set(excluded)
+        parts = []
+
+        def walk(element):
+            if element in excluded:
+                return
+            # Comments aren't part of the text, but the text following them is.
+            if isinstance(element.tag, str) and element.text:
+                parts.append(element.text)
+            for child in element:
+                walk(child)
+                if child.tail:
+                    parts.append(child.tail)
+
+        walk(node)
+        return ''.join(parts)
+
+    def attr(self, node, name):
+        return node.get(name, '')
+
+    def tostring(self, node):
+        return self.etree.tostring(node, encoding='utf-8', with_tail=False)
+
+    # The page is parsed with iterparse(), which hands over each element with the given tag as soon as it's complete.
+    # The elements that aren't kept are cleared and the ones before them are removed from the tree, so the tree never
+    # holds much more than the kept elements and the one being parsed.
+    def parse_elements(self, content, tag, class_name, keep):
+        encoding = None
+        if isinstance(content, str):
+            content, encoding = content.encode('utf-8'), 'utf-8'
+
+        kept = []
+        for _, element in self.etree.iterparse(io.BytesIO(content), tag=tag, html=True, encoding=encoding):
+            # Elements nested inside another element with the same tag are kept or cleared along with it.
+            if next(element.iterancestors(tag), None) is not None:
+                continue
+            if class_name in element.get('class', '').split() and keep(element):
+                kept.append(element)
+            else:
+                element.clear(keep_tail=True)
+            # The kept elements stay alive once they're removed from the tree, since they're held in kept.
+            parent = element.getparent()
+            while element.getprevious() is not None:
+                del parent[0]
+        return kept
+
+
+# Parser built on BeautifulSoup with Python's own html.parser. The slowest of the three, but the most forgiving of
+# broken markup, so it's the one to fall back to when a site's pages come out wrong with the others.
+class SoupParser:
+    name = 'bs4'
+
+    def __init__(self):
+        try:
+            import bs4
+            import soupsieve
+        except ImportError:
+            raise SystemExit('The bs4 parser requires BeautifulSoup: pip install beautifulsoup4')
+
+        self.bs4 = bs4
+        self.soupsieve = soupsieve
+        self.node_types = (bs4.Tag,)
+
+    # Unlike the other parsers, html.parser neither turns line breaks into '\n' nor keeps strings made only of spaces
+    # as they are, so the line breaks are turned by hand, and the spaces are kept everywhere inside the page.
+    def parse(self, html_text):
+        if isinstance(html_text, bytes):
+            html_text = html_text.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        else:
+            html_text = html_text.replace('\r\n', '\n').replace('\r', '\n')
+        return self.bs4.BeautifulSoup(html_text, 'html.parser',
+                                      preserve_whitespace_tags={'html', 'body', 'pre', 'textarea'})
+
+    def compile(self, selector):
+        return self.soupsieve.compile(selector).select
+
+    def text(self, node, excluded=()):
+        excluded = {id(element) for element in excluded}
+        parts = []
+
+        def walk(element):
+            for child in element.children:
+                if isinstance(child, self.bs4.Tag):
+                    if id(child) not in excluded:
+                        walk(child)
+                # Comments, doctypes and the like are preformatted strings, and aren't part of the text.
+                elif not isinstance(child, self.bs4.element.PreformattedString):
+                    parts.append(str(child))
+
+        walk(node)
+        return ''.join(parts)
+
+    def attr(self, node, name):
+        value = node.get(name, '')
+        # The values of multi-valued attributes, such as class, are split into lists.
+        return ' '.join(value) if isinstance(value, list) else value
+
+    def tostring(self, node):
+        return str(node).encode('utf-8')
+
+    # The whole page is built, then the elements are picked out of it.
+    def parse_elements(self, content, tag, class_name, keep):
+        return [element for element in self.compile(f'{tag}.{class_name}')(self.parse(content)) if keep(element)]
+
+
+# Parser built on selectolax and its lexbor engine: an HTML5 parser written in C, with the lowest overhead per element.
+class SelectolaxParser:
+    name = 'selectolax'
+
+    def __init__(self):
+        try:
+            from selectolax import lexbor
+        except ImportError:
+            raise SystemExit('The selectolax parser requires selectolax: pip install selectolax')
+
+        self.lexbor = lexbor
+        self.node_types = (lexbor.LexborNode,)
+
+    def parse(self, html_text):
+        return self.lexbor.LexborHTMLParser(html_text).root
+
+    def compile(self, selector):
+        return lambda node: node.css(selector)
+
+    def text(self, node, excluded=()):
+        if not excluded:
+            return node.text(deep=True)
+
+        # The elements are wrappers built on demand, so they're told apart by the address of the element they wrap.
+        excluded = {element.mem_id for element in excluded}
+        parts = []
+
+        def walk(element):
+            for child in element.iter(include_text=True):
+                if child.tag == '-text':
+                    parts.append(child.text_content)
+                elif not child.tag.startswith('-') and child.mem_id not in excluded:
+                    walk(child)
+
+        walk(node)
+        return ''.join(parts)
+
+    def attr(self, node, name):
+        return node.attributes.get(name) or ''
+
+    def tostring(self, node):
+        return node.html.encode('utf-8')
+
+    # The whole page is built, then the elements are picked out of it.
+    def parse_elements(self, content, tag, class_name, keep):
+        return [element for element in self.parse(content).css(f'{tag}.{class_name}') if keep(element)]
+
+
+# The parsers that can be picked, by name.
+parser_types = {parser_type.name: parser_type for parser_type in [LxmlParser, SoupParser, SelectolaxParser]}
+
+
+# Pick the parser the pages are parsed with from now on, by name.
+def use(name):
+    global selected
+    if name not in parser_types:
+        raise ValueError(f'unknown parser: {name}')
+    selected = name
+
+
+# Get a parser by name, or the selected parser if no name is given. Each parser is only built once.
+def get(name=None):
+    name = name or selected
+    parser = _parsers.get(name)
+    if parser is None:
+        if name not in parser_types:
+            raise SystemExit(f'Unknown parser: {name}. Choose one of: {", ".join(parser_types)}.')
+        with _lock:
+            parser = _parsers.get(name)
+            if parser is None:
+                parser = _parsers[name] = parser_types[name]()
+                for node_type in parser.node_types:
+                    _node_types[node_type] = parser
+    return parser
+
+
+# Get the parser that built an element, so an element is always read with the parser it came from.
+def for_node(node):
+    parser = _node_types.get(type(node))
+    if parser is None:
+        for parser in list(_parsers.values()):
+            if isinstance(node, parser.node_types):
+                _node_types[type(node)] = parser
+                return parser
+        raise TypeError(f'{type(node).__name__} was not built by any of the parsers')
+    return parser
@@ -0,0 +1,80 @@
+from enum import Enum
+
+
+# The five boroughs of NYC.
+class Borough(Enum):
+    MANHATTAN = 'Manhattan'
+    BRONX = 'Bronx'
+    BROOKLYN = 'Brooklyn'
+    QUEENS = 'Queens'
+    STATEN_ISLAND = 'Staten Island'
+
+    # Find the borough a text names, whatever its case and spacing. Returns None if it isn't a borough.
+    @classmethod
+    def parse(cls, text):
+        return _boroughs.get(' '.join(str(text).split()).lower())
+
+
+_boroughs = {borough.value.lower(): borough for borough in Borough}  # Boroughs by their lowercase name.
+
+
+# Base of the records of every source. The fields of a record are typed and kept in __slots__, so a record holds no
+# __dict__, and values such as the district number are parsed once, when the record is built, instead of every time
+# the records are sorted. Iterating over a record gives the values of its columns as they're exported, in the order
+# of the headers of its source, so a record can be written anywhere a row of extracted data can.
+class Record:
+    __slots__ = ()
+
+    # The values of the columns of the record, in the order of the headers of its source.
+    def row(self):
+        raise NotImplementedError
+
+    # The addresses, phone and fax numbers, and email address of the record, saved to the contacts table of the
+    # database, as (office number, kind, value) tuples, where kind is 'address', 'phone', 'fax', or 'email'.
+    def contacts(self):
+        return []
+
+    # The row is built every time the record is iterated over, so code that reads a row more than once should turn it
+    # into a list first, as export.write_csv() does.
+    def __iter__(self):
+        return iter(self.row())
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+# A batch of rows stored by column: one list of values for each column, instead of one list for each row.
+# The values of a column can then be turned into something else with map(), which only does it once for each distinct
+# value: a million assets spread over 51 council districts cost 51 lookups instead of a million.
+class ColumnBatch:
+    __slots__ = ('columns', 'size')
+
+    def __init__(self, columns, size):
+        self.columns = columns
+        self.size = size  # Number of rows.
+
+    # Build a batch out of rows, keeping only the columns at the given indexes, or every column if none are given.
+    # Rows too short to hold a column are given an empty value for it.
+    @classmethod
+    def from_rows(cls, rows, indexes=None):
+        rows = rows if isinstance(rows, list) else list(rows)
+        if indexes is None:
+            indexes = range(max([len(row) for row in rows] + [0]))
+        return cls([[row[index] if index < len(row) else '' for row in rows] for index in indexes], len(rows))
+
+    def __len__(self):
+        return self.size
+
+    # Call method() with the values of the given columns of each row, and return what it returned for each row.
+    # method() is only called once for each distinct combination of values, so it must not have side effects.
+    def map(self, method, *indexes):
+        results = {}
+        values = zip(*(self.columns[index] for index in indexes))
+        mapped = []
+        for key in values:
+            result = results.get(key, results)
+            if result is results:
+                result = results[key] = method(*key)
+            mapped.append(result)
+        return mapped
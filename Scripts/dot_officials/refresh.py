@@ -0,0 +1,128 @@
+import argparse
+import datetime as dt
+import heapq
+import json
+import os
+import re
+import sys
+import time
+
+from dot_officials import arguments
+from dot_officials import export
+from dot_officials import metrics
+from dot_officials import sources
+
+# Seconds between two refreshes of each source. The Council changes the most often, and the Community Boards the least.
+default_intervals = {
+    'community-boards': 24 * 60 * 60,
+    'house': 24 * 60 * 60,
+    'council': 60 * 60,
+    'senate': 6 * 60 * 60,
+    'assembly': 6 * 60 * 60,
+}
+state_path = 'Refresh State.json'  # File keeping the fingerprint of each source, so a restart doesn't export again.
+interval_units = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+# Helper method to read an interval such as 90s, 30m, 1h or 1d. A number without a unit is in seconds.
+def parse_interval(text):
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd]?)', text.strip().lower())
+    if match is None:
+        raise ValueError(f'invalid interval: {text}')
+    return float(match.group(1)) * interval_units[match.group(2) or 's']
+
+
+# Helper method to read an --every option, such as council=1h.
+def interval_option(value):
+    name, _, interval = value.partition('=')
+    if name not in sources.scripts:
+        raise argparse.ArgumentTypeError(f'expected SOURCE=INTERVAL with SOURCE one of: '
+                                         f'{", ".join(sources.scripts)}')
+    try:
+        return name, parse_interval(interval)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+# Helper method to read the fingerprints saved by an earlier refresh.
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+# Helper method to save the fingerprints, so they survive a restart of the service.
+def save_state(path, state):
+    with export.atomic(path) as temp_path, open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file, indent=2)
+
+
+# Refresh a source: request its listing (the list of officials every script starts from) and compare its fingerprint
+# with the one of the last refresh. If nothing changed, the detail pages and the export are skipped. Otherwise the
+# source is scraped from the listing, without requesting it again, and exported like its script would. The report
+# of the run includes the request of the listing. Returns True if the source was exported.
+def refresh_source(name, state, diff=False, database=None, formats=None, profile=False):
+    module = sources.load(name)
+    metrics.reset()
+    with metrics.source(module.file_name), metrics.stage('fetch'):
+        listing = module.fetch_listing()
+    fingerprint = module.fingerprint(listing)
+    if state.get(name) == fingerprint:
+        print(f'{name}: unchanged since the last refresh, skipped.')
+        return False
+
+    metrics.run(module.file_name, lambda: module.export_data(module.scrape(listing=listing), diff=diff,
+                                                             database=database, formats=formats),
+                profile=profile, keep=True)
+    state[name] = fingerprint
+    return True
+
+
+# Refresh each source on its own interval, until the program is stopped. Every source is refreshed once at start.
+# The sources are refreshed one at a time, each as soon as its interval is up. A source that fails is tried again
+# at its next refresh, and doesn't stop the others.
+def serve(intervals, diff=False, database=None, formats=None, profile=False):
+    state = load_state(state_path)
+    schedule = [(time.time(), name) for name in intervals]
+    heapq.heapify(schedule)
+
+    while schedule:
+        due, name = heapq.heappop(schedule)
+        time.sleep(max(0.0, due - time.time()))
+
+        started = dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f'{started} Refreshing {name}')
+        try:
+            if refresh_source(name, state, diff=diff, database=database, formats=formats, profile=profile):
+                save_state(state_path, state)
+        except (Exception, SystemExit) as error:
+            # The scripts exit the program when their site can't be reached, so SystemExit is caught as well.
+            print(f'Unable to refresh {name}: {error}', file=sys.stderr)
+
+        # The next refresh is scheduled from when this one was due, so a slow refresh doesn't push back the others.
+        heapq.heappush(schedule, (max(due + intervals[name], time.time()), name))
+
+
+# Refresh the sources given on the command line, or every source if none are given, until the program is stopped.
+def main():
+    parser = arguments.build_parser('Refresh each source on its own schedule, exporting it only when it changed.')
+    parser.add_argument('sources', nargs='*', help='Sources to refresh: ' + ', '.join(sources.scripts) +
+                        '. Defaults to every source.')
+    parser.add_argument('--every', action='append', type=interval_option, default=[], metavar='SOURCE=INTERVAL',
+                        help='Time between two refreshes of a source, such as council=1h or community-boards=1d. '
+                             'Can be given once for each source.')
+    options = parser.parse_args()
+    for name in options.sources:
+        if name not in sources.scripts:
+            parser.error(f'unknown source: {name}')
+
+    intervals = dict(default_intervals)
+    intervals.update(options.every)
+    intervals = {name: intervals[name] for name in options.sources or sources.scripts}
+    for name, interval in intervals.items():
+        print(f'{name}: every {dt.timedelta(seconds=interval)}')
+    try:
+        serve(intervals, diff=options.diff, database=options.store, formats=options.formats, profile=options.profile)
+    except KeyboardInterrupt:
+        pass
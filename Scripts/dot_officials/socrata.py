@@ -0,0 +1,195 @@
+import codecs
+import itertools
+import json
+import os
+
+from dot_officials import client
+from dot_officials import export
+
+page_size = 1000  # Number of records requested at a time. Socrata returns 1,000 records when no limit is given.
+stream_page_size = 50000  # Number of records requested at a time when streaming. Records are never all in memory.
+chunk_size = 64 * 1024  # Number of bytes read from the response at a time when streaming.
+app_token = os.environ.get('SOCRATA_APP_TOKEN')  # Optional app token, for higher rate limits.
+
+
+# Helper method to quote a value inside of a SoQL query.
+def quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# Helper method to build the query parameters and headers of a SoQL query.
+def build_query(select=None, where=None, order=None, token=None):
+    params = {'$order': ', '.join(list(order or []) + [':id'])}
+    if select:
+        params['$select'] = ', '.join(select)
+    if where:
+        params['$where'] = where
+    headers = {}
+    if token or app_token:
+        headers['X-App-Token'] = token or app_token
+    return params, headers
+
+
+# Request the records of a Socrata dataset (such as NYC OpenData), letting the server do the work:
+# select: Columns to request. Every column is requested if empty.
+# where: SoQL condition the records must meet.
+# order: Columns to sort the records by. The records are also sorted by their :id, so paging is stable.
+# cache: Whether the pages can be served from the HTTP cache. Turned off by sync(), which polls for changes.
+# The records are requested page by page until the last page, so none are cut off by the default page size.
+# Returns the list of records. Raises client.FetchError if the server rejects the query.
+def query(resource_url, select=None, where=None, order=None, token=None, cache=True):
+    params, headers = build_query(select, where, order, token)
+
+    records = []
+    offset = 0
+    while True:
+        response = client.get(resource_url, headers=headers, cache=cache,
+                              params={**params, '$limit': page_size, '$offset': offset})
+        if not response.ok:
+            raise client.FetchError(f'Unable to query {resource_url}: HTTP {response.status_code} {response.text}')
+        page = response.json()
+        records.extend(page)
+        # A page that isn't full is the last page.
+        if len(page) < page_size:
+            return records
+        offset += page_size
+
+
+# Helper method to decode a JSON array one element at a time, out of chunks of bytes.
+# Only the element being decoded is held in memory, no matter how long the array is. Raises ValueError if the bytes
+# aren't a JSON array, or if they end before the closing ']', so a response cut off halfway is never taken for a
+# complete one.
+def iter_json_array(chunks):
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    started = False
+    # The end of the input is marked with None, so the elements still in the buffer are decoded one last time.
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        buffer = buffer[position:] + text_decoder.decode(b'' if final else chunk, final=final)
+        position = 0
+        while True:
+            # Skip the whitespace and the commas between the elements.
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError('Expected a JSON array, found: ' + buffer[position:position + 100])
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                break  # The element isn't complete yet. Wait for the next chunk.
+            # An element that ends with the buffer may have been cut off by the end of the chunk, such as 12 out of
+            # 123, so it's only decoded once the next chunk arrives, or the input ends.
+            if end == len(buffer) and not final:
+                break
+            position = end
+            yield element
+    raise ValueError('The JSON array ended early.' if started else 'Expected a JSON array, found nothing.')
+
+
+# Stream the records of a Socrata dataset one at a time. Takes the same options as query().
+# The response is decoded while it's being downloaded, so memory stays flat no matter how big the dataset is.
+# Raises client.FetchError if the server rejects the query, or if the connection breaks or the response is cut off
+# partway through.
+def stream(resource_url, select=None, where=None, order=None, token=None):
+    import requests
+
+    params, headers = build_query(select, where, order, token)
+
+    offset = 0
+    while True:
+        count = 0
+        with client.get(resource_url, headers=headers, stream=True,
+                        params={**params, '$limit': stream_page_size, '$offset': offset}) as response:
+            if not response.ok:
+                raise client.FetchError(f'Unable to query {resource_url}: HTTP {response.status_code} {response.text}')
+            records = iter_json_array(response.iter_content(chunk_size))
+            while True:
+                try:
+                    record = next(records)
+                except StopIteration:
+                    break
+                except (requests.RequestException, ValueError) as error:
+                    raise client.FetchError(f'Unable to read {resource_url}: {error}') from error
+                count += 1
+                yield record
+        # A page that isn't full is the last page.
+        if count < stream_page_size:
+            return
+        offset += stream_page_size
+
+
+# Helper method to read the local copy of a dataset saved by sync(). Returns None if there is none.
+def load_table(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+# Helper method to save the local copy of a dataset. The file is replaced all at once, so a crash never leaves half of
+# it behind.
+def save_table(path, table):
+    with export.atomic(path) as temp_path, open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(table, file, ensure_ascii=False)
+
+
+# Bring the local copy of a Socrata dataset, saved to path, up to date, and return its records. Takes the same select
+# and where options as query(). The first sync requests every record. Every later sync only requests the records whose
+# :updated_at is at or after the latest one seen so far (the high-water mark), along with the :id of every record, so
+# the records deleted from the dataset are found and dropped. The updated records are merged into the local copy, by
+# :id. If the select or where options change, the local copy is thrown away and every record is requested again.
+# The queries always go to the server: the same query is sent by every poll until the dataset changes, so a copy kept
+# in the HTTP cache would hide the changes made since it was saved.
+# The merged copy isn't saved: pass it to save_table() once the records have been exported, so that if the export
+# fails, the next sync requests the same changes again instead of losing them.
+# Returns the records, without the system fields (:id, :updated_at), the number of records that were added or updated,
+# and deleted, since the last sync, and the merged copy. Raises client.FetchError if the server rejects a query.
+def sync(resource_url, path, select=None, where=None, token=None):
+    query_key = {'resource': resource_url, 'select': list(select or []), 'where': where}
+    # The system fields are left out of '*', so they're always requested by name.
+    columns = list(select) + [':id', ':updated_at'] if select else [':*', '*']
+
+    table = load_table(path)
+    if table is None or table['query'] != query_key:
+        table = {'query': query_key, 'high_water': None, 'records': {}}
+        updates = query(resource_url, select=columns, where=where, token=token, cache=False)
+        deleted = []
+    else:
+        # The records updated at the high-water mark itself are requested again, in case some of them were updated
+        # after the last sync in the same instant. They're only counted as updated if they changed. Without a mark
+        # (the dataset was empty so far), every record is requested, which is just as cheap.
+        condition = where
+        if table['high_water'] is not None:
+            since = ':updated_at >= ' + quote(table['high_water'])
+            condition = f'({where}) AND {since}' if where else since
+        updates = query(resource_url, select=columns, where=condition, token=token, cache=False)
+        ids = {record[':id'] for record in query(resource_url, select=[':id'], where=where, token=token, cache=False)}
+        deleted = [record_id for record_id in table['records'] if record_id not in ids]
+
+    records = table['records']
+    updated = 0
+    for record in updates:
+        if records.get(record[':id']) != record:
+            records[record[':id']] = record
+            updated += 1
+    for record_id in deleted:
+        del records[record_id]
+    # The mark never goes back, even when the latest records are deleted or the dataset is empty.
+    marks = [record[':updated_at'] for record in updates if record.get(':updated_at')]
+    if table['high_water'] is not None:
+        marks.append(table['high_water'])
+    table['high_water'] = max(marks, default=None)
+
+    return [{key: value for key, value in record.items() if not key.startswith(':')}
+            for record in records.values()], updated, len(deleted), table
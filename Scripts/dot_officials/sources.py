@@ -0,0 +1,36 @@
+import importlib.util
+import os
+import threading
+
+scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each source and the script that scrapes it, relative to the Scripts folder.
+# Every script has a scrape() method that returns the rows of extracted data, along with the headers, file_name, and
+# sheet_title used to export them.
+scripts = {
+    'community-boards': os.path.join('Community Boards', 'NYC Community Boards.py'),
+    'house': os.path.join('Congressional District', 'Congressional Districts.py'),
+    'council': os.path.join('Council Members & Districts', 'Council Members & Districts.py'),
+    'senate': os.path.join('NYS Senate', 'NYS Senate.py'),
+    'assembly': os.path.join('State Assembly', 'State Assembly.py'),
+}
+
+_modules = {}
+_modules_lock = threading.Lock()
+
+
+# Load the script of a source as a module. The scripts have spaces in their names, so they can't be imported normally.
+def load(name):
+    with _modules_lock:
+        if name not in _modules:
+            path = os.path.join(scripts_dir, scripts[name])
+            # The scripts aren't part of the package, so they're only found when it's installed from a clone of the
+            # repository with pip install -e.
+            if not os.path.exists(path):
+                raise SystemExit(f'The script of {name} was not found at {path}. Install the package in editable mode '
+                                 f'from a clone of the repository: pip install -e .')
+            spec = importlib.util.spec_from_file_location('dot_officials_' + name.replace('-', '_'), path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _modules[name] = module
+    return _modules[name]
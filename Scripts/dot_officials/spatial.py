@@ -0,0 +1,188 @@
+import argparse
+import csv
+import json
+import os
+import time
+
+from dot_officials import join
+from dot_officials import lookup
+from dot_officials import store
+
+batch_size = 100000  # Number of points assigned to their districts at a time.
+
+# The district boundaries of each source, read from '<source>.geojson', '<source>.json' or '<source>.shp' in the
+# boundaries folder: the title of its columns in the output, the property holding the district number (as named in
+# the NYC Department of City Planning files, in either case), and the column holding the name of its official.
+layers = {
+    'community-boards': ('Community Board', 'BoroCD', 'Community Board Chair'),
+    'council': ('Council', 'CounDist', 'Name'),
+    'assembly': ('Assembly', 'AssemDist', 'Name'),
+    'senate': ('State Senate', 'StSenDist', 'Name'),
+    'house': ('Congressional', 'CongDist', 'Name'),
+}
+boundary_extensions = ['.geojson', '.json', '.shp']
+
+
+# Helper method to import numpy and shapely, which are only imported once assets are assigned, so the command still
+# starts (and prints its help) without them. Returns the numpy and shapely modules.
+def spatial_libraries():
+    try:
+        import numpy
+        import shapely
+    except ImportError:
+        raise SystemExit('Assigning assets to districts requires numpy and shapely: pip install numpy shapely')
+    return numpy, shapely
+
+
+# Helper method to get a property of a feature, whatever its case.
+def feature_property(properties, name):
+    for key, value in properties.items():
+        if key.lower() == name.lower():
+            return value
+    raise KeyError(f'No {name} property found. The properties are: {", ".join(properties)}')
+
+
+# Read the district boundaries of a GeoJSON file or a shapefile. Shapefiles are read with pyshp, if it's installed.
+# Returns the list of shapes and the list of their district numbers.
+def load_boundaries(path, district_property):
+    _, shapely = spatial_libraries()
+    if path.lower().endswith('.shp'):
+        try:
+            import shapefile
+        except ImportError:
+            raise SystemExit('Reading shapefiles requires pyshp: pip install pyshp. Or convert it to GeoJSON.')
+        with shapefile.Reader(path) as reader:
+            features = [{'geometry': record.shape.__geo_interface__, 'properties': record.record.as_dict()}
+                        for record in reader.iterShapeRecords()]
+    else:
+        with open(path, encoding='utf-8') as file:
+            features = json.load(file)['features']
+
+    geometries = [shapely.geometry.shape(feature['geometry']) for feature in features]
+    districts = [int(float(feature_property(feature['properties'], district_property))) for feature in features]
+    return geometries, districts
+
+
+# Spatial index of the boundaries of one type of district. The shapes are packed into an STRtree once, and then whole
+# arrays of points are matched against it in a single call, instead of testing every point against every shape.
+class DistrictIndex:
+
+    def __init__(self, geometries, districts):
+        self.np, self.shapely = spatial_libraries()
+        self.tree = self.shapely.STRtree(geometries)
+        self.districts = self.np.asarray(districts, dtype=self.np.int64)
+
+    # Find the district of each point. Returns an array of district numbers, with -1 for the points outside of every
+    # district (or with no coordinates). A point on the border of two districts is given one of them.
+    def assign(self, longitudes, latitudes):
+        points = self.shapely.points(longitudes, latitudes)
+        assigned = self.np.full(len(points), -1, dtype=self.np.int64)
+        # 'intersects' also matches the points on the border of a district, which 'within' leaves out. A point on the
+        # border of two districts matches both, and only its first match is kept.
+        point_indexes, shape_indexes = self.tree.query(points, predicate='intersects')
+        point_indexes, first = self.np.unique(point_indexes, return_index=True)
+        assigned[point_indexes] = self.districts[shape_indexes[first]]
+        return assigned
+
+
+# Load the boundaries of every type of district found in a folder. Returns a DistrictIndex by source.
+def load_indexes(directory):
+    indexes = {}
+    for name, (title, district_property, official_header) in layers.items():
+        for extension in boundary_extensions:
+            path = os.path.join(directory, name + extension)
+            if os.path.exists(path):
+                indexes[name] = DistrictIndex(*load_boundaries(path, district_property))
+                print(f'Loaded {len(indexes[name].districts)} {title} districts from', path)
+                break
+    return indexes
+
+
+# Helper method to get the official of each district of a source, out of the latest export of the source.
+# The Community Boards are numbered within each borough, so they're keyed by their community district number (BoroCD).
+def officials_by_district(officials, name):
+    index = officials.indexes.get(name)
+    if index is None:
+        return {}
+    official_header = layers[name][2]
+    if name != 'community-boards':
+        return {district: records[0].get(official_header, '') for district, records in index.by_district.items()
+                if district is not None}
+    by_district = {}
+    for code, borough in join.borough_codes.items():
+        for record in index.by_borough.get(borough.lower(), []):
+            board = store.number(record.get('Community Board Number', ''))
+            if board is not None:
+                by_district[code * 100 + board] = record.get(official_header, '')
+    return by_district
+
+
+# Helper method to read a coordinate, or NaN if it's missing.
+def coordinate(value):
+    try:
+        return float(value)
+    except ValueError:
+        return float('nan')
+
+
+# Assign the assets of a .csv file to their districts and officials, and save them to a new .csv file.
+# The file is read and assigned in batches, so memory stays flat no matter how many assets there are. Each type of
+# district found in the boundaries folder adds a '<type> District' and a '<type> Official' column, taken from the
+# latest exports found in the exports folder. Returns the number of assets assigned.
+def assign_file(input_path, output_path, boundaries_dir, exports_dir='.', latitude='Latitude', longitude='Longitude',
+                size=batch_size):
+    np, _ = spatial_libraries()
+    indexes = load_indexes(boundaries_dir)
+    if not indexes:
+        raise SystemExit(f'No district boundaries found in {boundaries_dir}. Expected files such as council.geojson.')
+    officials = lookup.Directory(exports_dir)
+    names = list(indexes)
+    district_officials = {name: officials_by_district(officials, name) for name in names}
+
+    count = 0
+    assign_time = 0.0
+    start = time.perf_counter()
+    with open(input_path, newline='', encoding='utf-8') as input_file, \
+            open(output_path, 'w', newline='', encoding='utf-8') as output_file:
+        headers, batches = join.read_batches(input_file, size)
+        latitude_index = headers.index(latitude)
+        longitude_index = headers.index(longitude)
+        writer = csv.writer(output_file)
+        writer.writerow(headers + [layers[name][0] + column for name in names for column in (' District', ' Official')])
+
+        for batch in batches:
+            latitudes = np.array([coordinate(row[latitude_index]) for row in batch])
+            longitudes = np.array([coordinate(row[longitude_index]) for row in batch])
+            assign_start = time.perf_counter()
+            assigned = {name: indexes[name].assign(longitudes, latitudes).tolist() for name in names}
+            assign_time += time.perf_counter() - assign_start
+
+            for n, row in enumerate(batch):
+                for name in names:
+                    district = assigned[name][n]
+                    row += ['', ''] if district < 0 else [district, district_officials[name].get(district, '')]
+                writer.writerow(row)
+            count += len(batch)
+
+    elapsed = time.perf_counter() - start
+    print(f'{count:,} assets assigned to {len(names)} types of districts in {elapsed:.1f}s '
+          f'({count / elapsed if elapsed else 0:,.0f} points/s overall, '
+          f'{count * len(names) / assign_time if assign_time else 0:,.0f} point lookups/s in the spatial index).')
+    print("Data outputted to (as a .csv) :", output_path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Assign the assets of a .csv file to their districts and officials.')
+    parser.add_argument('input', help='.csv file of assets, with a latitude and a longitude column.')
+    parser.add_argument('output', help='.csv file to save the assigned assets to.')
+    parser.add_argument('--boundaries', required=True,
+                        help='Folder with the district boundaries: ' + ', '.join(name + '.geojson' for name in layers) +
+                             ' (or .shp).')
+    parser.add_argument('--exports', default='.', help='Folder the scripts exported their .csv files to.')
+    parser.add_argument('--latitude', default='Latitude', help='Name of the latitude column.')
+    parser.add_argument('--longitude', default='Longitude', help='Name of the longitude column.')
+    parser.add_argument('--batch-size', type=int, default=batch_size, help='Number of assets assigned at a time.')
+    options = parser.parse_args()
+    assign_file(options.input, options.output, options.boundaries, options.exports, options.latitude,
+                options.longitude, options.batch_size)
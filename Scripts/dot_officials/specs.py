@@ -0,0 +1,132 @@
+import hashlib
+
+from dot_officials import metrics
+from dot_officials import parsers
+
+no_info = 'No info found.'  # Default value of a field when the element doesn't exist.
+
+
+# Helper post-processing method that removes the extra whitespace around a value.
+def strip(value):
+    return value.strip()
+
+
+# Helper post-processing method that keeps a value as is.
+def keep(value):
+    return value
+
+
+# Parse the contents of an HTML page with the selected parser, or with the parser named by parser (see parsers.py).
+# Returns the root element of the page.
+def parse_html(html_text, parser=None):
+    if not html_text or not html_text.strip():
+        html_text = '<html></html>'  # An empty page has no elements, so every field defaults to no value found.
+    with metrics.stage('parse'):
+        return parsers.get(parser).parse(html_text)
+
+
+# Fingerprint of a list of elements: a hash of their HTML, which changes whenever anything inside of them changes.
+# Used by the refresh service to tell if the part of a page we extract changed since the last refresh.
+def fingerprint(elements):
+    digest = hashlib.sha256()
+    for element in elements:
+        digest.update(parsers.for_node(element).tostring(element))
+    return digest.hexdigest()
+
+
+# Parse an HTML page, keeping only the elements with the given tag and class name for which keep(element) is true.
+# With lxml, the page is parsed incrementally, and the elements that aren't kept are thrown away as it's parsed.
+def parse_elements(content, tag, class_name, keep, parser=None):
+    with metrics.stage('parse'):
+        return parsers.get(parser).parse_elements(content, tag, class_name, keep)
+
+
+# A single value to extract from a row.
+# selector: CSS selector of the element(s) holding the value, relative to the row. The row itself is used if empty.
+# attr: Name of the attribute holding the value. The text of the element is used if empty.
+# many: Extract the value of every matching element as a list, instead of the first matching element only.
+# exclude: CSS selectors of elements whose text is left out of the value.
+# spec: Spec used to extract a list of values from each matching element, instead of its text.
+# post: Post-processing method applied to the extracted value (or list of values if many is set).
+# default: Value used when the element doesn't exist or when the value is empty.
+# missing: Value used when the element doesn't exist, if it differs from the default.
+class Field:
+
+    def __init__(self, selector=None, attr=None, many=False, exclude=(), spec=None, post=strip, default=no_info,
+                 missing=None):
+        self.selector = selector
+        self.attr = attr
+        self.many = many
+        self.exclude = list(exclude)
+        self.spec = spec
+        self.post = post
+        self.default = default
+        self.missing = default if missing is None else missing
+
+    # Extract the value of the field out of the elements matched by its selector.
+    # parser is the parser that built the row, and selectors are the selectors of the spec, compiled for it.
+    def extract(self, node, matches, parser, selectors):
+        if self.selector:
+            matches = matches[self.selector]
+        else:
+            matches = [node]
+        if not matches:
+            return self.missing
+
+        values = [self.value(match, parser, selectors) for match in (matches if self.many else matches[:1])]
+        value = self.post(values if self.many else values[0])
+        return value if value else self.default
+
+    # Helper method to get the raw value of a single element.
+    def value(self, element, parser, selectors):
+        if self.spec is not None:
+            return self.spec.extract(element)
+        if self.attr:
+            return parser.attr(element, self.attr)
+        excluded = []
+        for selector in self.exclude:
+            excluded += selectors[selector](element)
+        return parser.text(element, excluded)
+
+
+# The fields extracted from each row of a page, in the order of the columns.
+# The CSS selectors are compiled once for each parser, the first time a page built by that parser is extracted. Each
+# row is then extracted in a single pass: every distinct selector is evaluated once for the row, no matter how many
+# fields read from it.
+class Spec:
+
+    def __init__(self, fields, rows=None):
+        self.fields = list(fields)
+        self.rows_selector = rows
+        self.selectors = []  # Selectors of the fields, evaluated for every row.
+        for field in self.fields:
+            if field.selector and field.selector not in self.selectors:
+                self.selectors.append(field.selector)
+        self.compiled = {}  # Every selector of the spec, compiled, by the name of the parser they were compiled for.
+
+    # Helper method to get the selectors of the spec compiled for a parser, by selector.
+    def compiled_for(self, parser):
+        compiled = self.compiled.get(parser.name)
+        if compiled is None:
+            selectors = self.selectors + [selector for field in self.fields for selector in field.exclude]
+            if self.rows_selector:
+                selectors.append(self.rows_selector)
+            compiled = self.compiled[parser.name] = {selector: parser.compile(selector) for selector in selectors}
+        return compiled
+
+    # Find the rows of a page.
+    def rows(self, root):
+        if not self.rows_selector:
+            return [root]
+        return self.compiled_for(parsers.for_node(root))[self.rows_selector](root)
+
+    # Extract the values of every field from a single row.
+    def extract(self, node):
+        parser = parsers.for_node(node)
+        selectors = self.compiled_for(parser)
+        matches = {selector: selectors[selector](node) for selector in self.selectors}
+        return [field.extract(node, matches, parser, selectors) for field in self.fields]
+
+    # Extract the values of every field from every row of a page.
+    def extract_all(self, root):
+        return [self.extract(node) for node in self.rows(root)]
@@ -0,0 +1,167 @@
+import datetime as dt
+import re
+import sqlite3
+
+default_database = 'NYC Public Officials.sqlite3'  # Database the records are saved to when --store has no path.
+
+phone_pattern = re.compile(r'^\(?\d{3}\)?[\s.-]*\d{3}[\s.-]*\d{4}')  # A line starting with a phone number.
+phone_prefix = re.compile(r'^(phone|tel|telephone|p)\s*[:.]?\s*', re.IGNORECASE)  # "Phone: " in front of a number.
+fax_prefix = re.compile(r'^(fax|f)\s*[:.]?\s*', re.IGNORECASE)  # "Fax: " in front of a number.
+placeholder = re.compile(r'^No .*found[.!]?$')  # Value the scripts use when a value doesn't exist.
+
+
+# Helper method to turn a header into the name of a column, such as "District No." into district_no.
+def column_name(header):
+    return re.sub(r'[^a-z0-9]+', '_', header.lower()).strip('_')
+
+
+# Helper method to turn the name of the exported files of a source into the name of its table.
+def table_name(file_name):
+    return column_name(file_name)
+
+
+# Helper method to get the number found in a value, such as 33 in "District 33", out of every digit in it.
+# Returns None if there is none. The records parse their district numbers with it too, so there is a single parser.
+def number(value):
+    digits = ''.join(char for char in str(value) if char.isdecimal())
+    return int(digits) if digits else None
+
+
+# Helper method to split the lines of an office into its address and its phone and fax numbers.
+# Returns a list of (office number, kind, value) tuples, where kind is 'address', 'phone', or 'fax'. The lines of the
+# address are kept together as one value.
+def split_office(office, text):
+    address = []
+    numbers = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or placeholder.match(line):
+            continue
+        fax = fax_prefix.sub('', line)
+        phone = phone_prefix.sub('', line)
+        if fax != line and phone_pattern.match(fax):
+            numbers.append((office, 'fax', fax))
+        elif phone_pattern.match(phone):
+            numbers.append((office, 'phone', phone))
+        else:
+            address.append(line)
+    return ([(office, 'address', '\n'.join(address))] if address else []) + numbers
+
+
+# Helper method to split a block of offices, separated by a blank line, into their parts, for the sources that only
+# have their offices as a single block of text. Returns a list of (office number, kind, value) tuples.
+def split_contacts(text):
+    contacts = []
+    for office, block in enumerate(re.split(r'\n\s*\n', text.strip()), start=1):
+        contacts.extend(split_office(office, block))
+    return contacts
+
+
+# Helper method to get the contact of an email address, if a value holds one. Returns a list of (office number, kind,
+# value) tuples.
+def email_contacts(value):
+    return [(1, 'email', value.strip())] if '@' in value else []
+
+
+# Open a database, creating the contacts table the first time.
+def connect(path=default_database):
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.execute('PRAGMA journal_mode = WAL')  # Readers aren't blocked while a scrape is being saved.
+    with connection:
+        connection.execute('CREATE TABLE IF NOT EXISTS contacts (source TEXT NOT NULL, record_key TEXT NOT NULL, '
+                           'office INTEGER NOT NULL, kind TEXT NOT NULL, value TEXT NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS contacts_record ON contacts (source, record_key)')
+        connection.execute('CREATE INDEX IF NOT EXISTS contacts_value ON contacts (kind, value)')
+    return connection
+
+
+# Helper method to create the table of a source, or add the columns it's missing if the headers changed.
+# Each record is identified by its natural key, and the district number and borough are indexed.
+def create_table(connection, table, headers):
+    columns = [column_name(header) for header in headers]
+    connection.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (id INTEGER PRIMARY KEY, '
+                       'record_key TEXT NOT NULL UNIQUE, district INTEGER, borough TEXT, scraped_at TEXT NOT NULL)')
+    existing = {row['name'] for row in connection.execute(f'PRAGMA table_info("{table}")')}
+    for column in columns:
+        if column not in existing:
+            connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" TEXT')
+    connection.execute(f'CREATE INDEX IF NOT EXISTS "{table}_district" ON "{table}" (district)')
+    connection.execute(f'CREATE INDEX IF NOT EXISTS "{table}_borough" ON "{table}" (borough)')
+    return columns
+
+
+# Save the records of a source to a database, in a single transaction. The columns are saved from the values the
+# records are exported with, and the contacts from the addresses, phone and fax numbers, and email address each record
+# holds, as returned by its contacts() method.
+# Records are matched on their natural key: new records are inserted and existing records are updated in place.
+# If prune is set, the records that weren't given are deleted, since a full scrape holds every current record.
+# Returns the number of records saved.
+def save(path, file_name, headers, key_columns, records, prune=True):
+    table = table_name(file_name)
+    key_indexes = [headers.index(column) for column in key_columns]
+    borough_index = headers.index('Borough') if 'Borough' in headers else None
+    # Datetime objects to grab both the data and time the records were saved. It also tells this save's records apart
+    # from the records left over from earlier saves.
+    scraped_at = dt.datetime.now().isoformat(timespec='microseconds')
+
+    connection = connect(path)
+    try:
+        with connection:
+            columns = create_table(connection, table, headers)
+            quoted = ', '.join(f'"{column}"' for column in columns)
+            upsert = (f'INSERT INTO "{table}" (record_key, district, borough, scraped_at, {quoted}) '
+                      f'VALUES ({", ".join("?" * (len(columns) + 4))}) ON CONFLICT (record_key) DO UPDATE SET '
+                      'district = excluded.district, borough = excluded.borough, scraped_at = excluded.scraped_at, ' +
+                      ', '.join(f'"{column}" = excluded."{column}"' for column in columns))
+
+            # If several records share a key, the last one is kept.
+            saved = {}
+            contacts = {}
+            for record in records:
+                # Empty values are saved the same way they're exported to the .csv file.
+                row = ['' if value is None else str(value) for value in record.row()]
+                record_key = '|'.join(row[n] for n in key_indexes)
+                borough = row[borough_index] if borough_index is not None else None
+                saved[record_key] = [record_key, number(row[key_indexes[-1]]), borough, scraped_at] + row
+                contacts[record_key] = [(table, record_key) + contact for contact in record.contacts()]
+
+            connection.executemany(upsert, saved.values())
+            # The contacts of the saved records are replaced with their current contacts.
+            connection.executemany('DELETE FROM contacts WHERE source = ? AND record_key = ?',
+                                   [(table, record_key) for record_key in saved])
+            connection.executemany('INSERT INTO contacts VALUES (?, ?, ?, ?, ?)',
+                                   [contact for record_contacts in contacts.values() for contact in record_contacts])
+            if prune:
+                connection.execute(f'DELETE FROM "{table}" WHERE scraped_at != ?', (scraped_at,))
+                connection.execute(f'DELETE FROM contacts WHERE source = ? AND record_key NOT IN '
+                                   f'(SELECT record_key FROM "{table}")', (table,))
+    finally:
+        connection.close()
+
+    print(f'{len(saved)} record(s) saved to', path)
+    return len(saved)
+
+
+# Find the records of a source by district number and/or borough, using the indexes.
+# Returns a list of dictionaries, by column name, each with the contacts of the record under 'contacts'.
+def find(connection, file_name, district=None, borough=None):
+    table = table_name(file_name)
+    conditions = []
+    params = []
+    if district is not None:
+        conditions.append('district = ?')
+        params.append(district)
+    if borough is not None:
+        conditions.append('borough = ?')
+        params.append(borough)
+    where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+    records = []
+    for row in connection.execute(f'SELECT * FROM "{table}"{where} ORDER BY borough, district', params):
+        record = dict(row)
+        record['contacts'] = [dict(contact) for contact in connection.execute(
+            'SELECT office, kind, value FROM contacts WHERE source = ? AND record_key = ? ORDER BY rowid',
+            (table, row['record_key']))]
+        records.append(record)
+    return records